@@ -46,6 +46,14 @@ dev_requires = [
     "coverage>=7.0.0",
 ]
 
+# Optionally compile the validator, the hottest pure-Python module, to a C
+# extension with mypyc (shipped with mypy). Opt in with SAILOR_MYPYC=1 and build
+# without isolation so mypy is importable; otherwise the .py module is used.
+ext_modules = []
+if os.environ.get("SAILOR_MYPYC") == "1":
+    from mypyc.build import mypycify
+    ext_modules = mypycify(["src/sailor_mcp/validators.py"])
+
 setup(
     name="sailor-mcp",
     version="2.0.0",
@@ -75,6 +83,7 @@ setup(
     packages=find_packages(where="src"),
     python_requires=">=3.8",
     install_requires=install_requires,
+    ext_modules=ext_modules,
     extras_require={
         "dev": dev_requires,
         "test": [
@@ -24,14 +24,15 @@ class CreateDiagramResponse(BaseModel):
     valid: bool
     diagram_type: Optional[str] = None
     share_url: Optional[str] = None
-    errors: List[str] = []
-    suggestions: List[str] = []
+    errors: List[str] = Field(default_factory=list)
+    suggestions: List[str] = Field(default_factory=list)
 
 
 class ValidateRequest(BaseModel):
     """Request to validate Mermaid code."""
     code: str = Field(..., description="Mermaid diagram code to validate")
     auto_fix: bool = Field(False, description="Attempt to auto-fix errors")
+    fast_fail: bool = Field(False, description="Stop at the first error instead of collecting all")
 
 
 class ValidationError(BaseModel):
@@ -47,12 +48,25 @@ class ValidateResponse(BaseModel):
     """Response from validation."""
     is_valid: bool
     diagram_type: Optional[str] = None
-    errors: List[ValidationError] = []
-    warnings: List[ValidationError] = []
+    errors: List[ValidationError] = Field(default_factory=list)
+    warnings: List[ValidationError] = Field(default_factory=list)
     metadata: Optional[Dict[str, Any]] = None
     fixed_code: Optional[str] = None
 
 
+class BatchValidateRequest(BaseModel):
+    """Request to validate several diagrams at once."""
+    # Bounded because the whole batch runs in one threadpool worker
+    codes: List[str] = Field(..., max_length=100, description="Mermaid diagram codes to validate, at most 100")
+    auto_fix: bool = Field(False, description="Attempt to auto-fix errors")
+    fast_fail: bool = Field(False, description="Stop at the first error instead of collecting all")
+
+
+class BatchValidateResponse(BaseModel):
+    """Response from batch validation, in request order."""
+    results: List[ValidateResponse]
+
+
 class RenderRequest(BaseModel):
     """Request to render a diagram."""
     code: str = Field(..., description="Mermaid code to render")
@@ -69,7 +83,9 @@ class RenderResponse(BaseModel):
     """Response from rendering."""
     success: bool
     format: Optional[str] = None
-    data: Optional[str] = Field(None, description="Base64 encoded image data")
+    data: Optional[str] = Field(
+        None, description="Base64 encoded image data (raw markup for SVG, see metadata.encoding)"
+    )
     metadata: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
@@ -3,23 +3,28 @@ FastAPI server for Sailor web frontend.
 """
 
 import asyncio
+import json
 import uuid
 from contextlib import asynccontextmanager
+from dataclasses import asdict
+from functools import lru_cache
 from typing import Optional
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import uvicorn
 
 from ..core.validator import MermaidValidator
-from ..core.renderer import MermaidRenderer, RenderConfig, OutputFormat
+from ..core.renderer import RenderConfig, OutputFormat, get_renderer
 from ..core.generator import DiagramGenerator
 from .models import (
     CreateDiagramRequest,
     CreateDiagramResponse,
     ValidateRequest,
     ValidateResponse,
+    BatchValidateRequest,
+    BatchValidateResponse,
     RenderRequest,
     RenderResponse,
     ValidationError as ValidationErrorModel,
@@ -30,7 +35,7 @@ from .websocket import ConnectionManager
 
 # Global instances
 validator = MermaidValidator()
-renderer = MermaidRenderer()
+renderer = get_renderer()
 generator = DiagramGenerator()
 manager = ConnectionManager()
 
@@ -46,6 +51,69 @@ async def lifespan(app: FastAPI):
     await renderer.close()
 
 
+# Static response bodies, encoded once instead of rebuilt on every request
+_DIAGRAM_TYPES_JSON = json.dumps({
+    "types": [
+        {"id": "flowchart", "name": "Flowchart", "description": "Flow diagrams and process charts"},
+        {"id": "sequence", "name": "Sequence Diagram", "description": "Interaction sequences"},
+        {"id": "class", "name": "Class Diagram", "description": "Object-oriented class structures"},
+        {"id": "state", "name": "State Diagram", "description": "State machines and transitions"},
+        {"id": "er", "name": "ER Diagram", "description": "Entity relationship diagrams"},
+        {"id": "gantt", "name": "Gantt Chart", "description": "Project timelines"},
+        {"id": "pie", "name": "Pie Chart", "description": "Statistical pie charts"},
+        {"id": "git", "name": "Git Graph", "description": "Git commit history"},
+        {"id": "journey", "name": "User Journey", "description": "User experience flows"},
+        {"id": "mindmap", "name": "Mind Map", "description": "Hierarchical information"},
+    ]
+}).encode()
+
+
+@lru_cache(maxsize=32)
+def _templates_json(template_type: Optional[str] = None) -> bytes:
+    """Encoded template listing, optionally for one type; templates never change at runtime."""
+    templates = generator.get_templates(template_type)
+    return json.dumps({
+        "templates": [{**asdict(t), "type": t.type.value} for t in templates]
+    }).encode()
+
+
+def validate_code(code: str, auto_fix: bool = False, fast_fail: bool = False) -> ValidateResponse:
+    """Validate code, optionally auto-fixing it, and build the API response."""
+    result = validator.validate(code, fast_fail=fast_fail)
+    
+    # Auto-fix if requested
+    fixed_code = None
+    if auto_fix and not result.is_valid:
+        candidate = validator.fix_common_errors(code)
+        if validator.validate(candidate, fast_fail=True).is_valid:
+            fixed_code = candidate
+    
+    return ValidateResponse(
+        is_valid=result.is_valid,
+        diagram_type=result.diagram_type.value if result.diagram_type else None,
+        errors=[
+            ValidationErrorModel(
+                line=e.line,
+                column=e.column,
+                message=e.message,
+                severity=e.severity.label,
+                suggestion=e.suggestion
+            ) for e in result.errors
+        ],
+        warnings=[
+            ValidationErrorModel(
+                line=w.line,
+                column=w.column,
+                message=w.message,
+                severity=w.severity.label,
+                suggestion=w.suggestion
+            ) for w in result.warnings
+        ],
+        metadata=result.metadata,
+        fixed_code=fixed_code
+    )
+
+
 def create_app() -> FastAPI:
     """Create and configure FastAPI application."""
     app = FastAPI(
@@ -107,8 +175,8 @@ def create_app() -> FastAPI:
             else:
                 raise HTTPException(400, "Either description or code must be provided")
 
-            # Validate the code
-            validation = validator.validate(code)
+            # Validate the code off the event loop
+            validation = await asyncio.to_thread(validator.validate, code)
             
             # Generate diagram ID
             diagram_id = str(uuid.uuid4())
@@ -126,43 +194,25 @@ def create_app() -> FastAPI:
             raise HTTPException(500, str(e))
 
     @app.post("/api/v1/diagram/validate", response_model=ValidateResponse)
-    async def validate_diagram(request: ValidateRequest):
-        """Validate Mermaid diagram code."""
+    def validate_diagram(request: ValidateRequest):
+        """Validate Mermaid diagram code (sync, so FastAPI runs it in its threadpool)."""
         try:
-            result = validator.validate(request.code)
-            
-            # Auto-fix if requested
-            fixed_code = None
-            if request.auto_fix and not result.is_valid:
-                fixed_result = validator.auto_fix(request.code)
-                if fixed_result.is_valid:
-                    fixed_code = fixed_result.code
-            
-            return ValidateResponse(
-                is_valid=result.is_valid,
-                diagram_type=result.diagram_type,
-                errors=[
-                    ValidationErrorModel(
-                        line=e.line,
-                        column=e.column,
-                        message=e.message,
-                        severity=e.severity,
-                        suggestion=e.suggestion
-                    ) for e in result.errors
-                ],
-                warnings=[
-                    ValidationErrorModel(
-                        line=w.line,
-                        column=w.column,
-                        message=w.message,
-                        severity="warning",
-                        suggestion=w.suggestion
-                    ) for w in result.warnings
-                ],
-                metadata=result.metadata,
-                fixed_code=fixed_code
-            )
-            
+            return validate_code(request.code, request.auto_fix, request.fast_fail)
+        except Exception as e:
+            raise HTTPException(500, str(e))
+
+    @app.post("/api/v1/diagram/validate/batch", response_model=BatchValidateResponse)
+    def validate_diagrams_batch(request: BatchValidateRequest):
+        """Validate many diagrams in one request.
+
+        Declared sync so FastAPI runs the whole batch in one worker thread,
+        paying request parsing and dispatch once instead of per diagram.
+        """
+        try:
+            return BatchValidateResponse(results=[
+                validate_code(code, request.auto_fix, request.fast_fail)
+                for code in request.codes
+            ])
         except Exception as e:
             raise HTTPException(500, str(e))
 
@@ -170,8 +220,8 @@ def create_app() -> FastAPI:
     async def render_diagram(request: RenderRequest):
         """Render Mermaid diagram to image."""
         try:
-            # Validate first
-            validation = validator.validate(request.code)
+            # Validate first, off the event loop
+            validation = await asyncio.to_thread(validator.validate, request.code)
             if not validation.is_valid:
                 return RenderResponse(
                     success=False,
@@ -207,6 +257,11 @@ def create_app() -> FastAPI:
         except Exception as e:
             raise HTTPException(500, str(e))
 
+    @app.get("/api/v1/diagram/types")
+    async def get_diagram_types():
+        """Get supported diagram types."""
+        return Response(content=_DIAGRAM_TYPES_JSON, media_type="application/json")
+
     @app.get("/api/v1/diagram/{diagram_id}")
     async def get_diagram(diagram_id: str):
         """Get diagram by ID."""
@@ -216,30 +271,7 @@ def create_app() -> FastAPI:
     @app.get("/api/v1/templates")
     async def get_templates(type: Optional[str] = None):
         """Get available diagram templates."""
-        templates = generator.list_templates()
-        
-        if type:
-            templates = [t for t in templates if t.get("type") == type]
-        
-        return {"templates": templates}
-
-    @app.get("/api/v1/diagram/types")
-    async def get_diagram_types():
-        """Get supported diagram types."""
-        return {
-            "types": [
-                {"id": "flowchart", "name": "Flowchart", "description": "Flow diagrams and process charts"},
-                {"id": "sequence", "name": "Sequence Diagram", "description": "Interaction sequences"},
-                {"id": "class", "name": "Class Diagram", "description": "Object-oriented class structures"},
-                {"id": "state", "name": "State Diagram", "description": "State machines and transitions"},
-                {"id": "er", "name": "ER Diagram", "description": "Entity relationship diagrams"},
-                {"id": "gantt", "name": "Gantt Chart", "description": "Project timelines"},
-                {"id": "pie", "name": "Pie Chart", "description": "Statistical pie charts"},
-                {"id": "git", "name": "Git Graph", "description": "Git commit history"},
-                {"id": "journey", "name": "User Journey", "description": "User experience flows"},
-                {"id": "mindmap", "name": "Mind Map", "description": "Hierarchical information"},
-            ]
-        }
+        return Response(content=_templates_json(type), media_type="application/json")
 
     @app.websocket("/ws")
     async def websocket_endpoint(websocket: WebSocket):
@@ -247,24 +279,24 @@ def create_app() -> FastAPI:
         await manager.connect(websocket)
         try:
             while True:
-                # Receive message
-                data = await websocket.receive_json()
-                message = WebSocketMessage(**data)
+                # Receive message; pydantic-core parses and validates the raw
+                # JSON in one pass, without building an intermediate dict
+                message = WebSocketMessage.model_validate_json(await websocket.receive_text())
                 
                 # Process message
                 if message.action == "validate":
-                    # Real-time validation
-                    result = validator.validate(message.code)
+                    # Real-time validation; only the first error is sent back
+                    result = await asyncio.to_thread(validator.validate, message.code, fast_fail=True)
                     response = WebSocketResponse(
                         action="validation",
                         valid=result.is_valid,
                         error=result.errors[0].message if result.errors else None
                     )
-                    await manager.send_personal(response.dict(), websocket)
+                    await manager.send_model(response, websocket)
                     
                 elif message.action == "render":
-                    # Real-time render (preview)
-                    validation = validator.validate(message.code)
+                    # Real-time render (preview); validity is all that matters here
+                    validation = await asyncio.to_thread(validator.validate, message.code, fast_fail=True)
                     if validation.is_valid:
                         # For preview, use smaller size and PNG
                         config = RenderConfig(
@@ -282,7 +314,7 @@ def create_app() -> FastAPI:
                             action="error",
                             message="Invalid diagram code"
                         )
-                    await manager.send_personal(response.dict(), websocket)
+                    await manager.send_model(response, websocket)
                     
                 elif message.action == "collaborate":
                     # Collaborative editing
@@ -297,6 +329,9 @@ def create_app() -> FastAPI:
                         )
                     
         except WebSocketDisconnect:
+            pass
+        finally:
+            # Any other error ends the session too; never leave it registered
             manager.disconnect(websocket)
 
 
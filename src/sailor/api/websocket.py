@@ -2,8 +2,10 @@
 WebSocket connection management for real-time features.
 """
 
-from typing import Dict, Set, List
+import asyncio
+from typing import Dict, Set, List, Iterable
 from fastapi import WebSocket
+from pydantic import BaseModel
 import json
 
 
@@ -11,8 +13,8 @@ class ConnectionManager:
     """Manages WebSocket connections and rooms."""
     
     def __init__(self):
-        # Active connections
-        self.active_connections: List[WebSocket] = []
+        # Active connections; a set so disconnects are O(1)
+        self.active_connections: Set[WebSocket] = set()
         # Room memberships
         self.rooms: Dict[str, Set[WebSocket]] = {}
         # Connection to rooms mapping
@@ -21,12 +23,12 @@ class ConnectionManager:
     async def connect(self, websocket: WebSocket):
         """Accept and track a new connection."""
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
         self.connection_rooms[websocket] = set()
     
     def disconnect(self, websocket: WebSocket):
-        """Remove a connection and clean up room memberships."""
-        self.active_connections.remove(websocket)
+        """Remove a connection and clean up room memberships; safe to repeat."""
+        self.active_connections.discard(websocket)
         
         # Remove from all rooms
         if websocket in self.connection_rooms:
@@ -41,14 +43,13 @@ class ConnectionManager:
         """Send a message to a specific connection."""
         await websocket.send_json(message)
     
+    async def send_model(self, model: BaseModel, websocket: WebSocket):
+        """Send a pydantic model, serialized straight to JSON by pydantic-core."""
+        await websocket.send_text(model.model_dump_json())
+    
     async def broadcast(self, message: dict):
         """Broadcast a message to all connected clients."""
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                # Connection might be closed
-                pass
+        await self._fan_out(message, list(self.active_connections))
     
     async def join_room(self, websocket: WebSocket, room: str):
         """Add a connection to a room."""
@@ -70,13 +71,24 @@ class ConnectionManager:
     async def broadcast_to_room(self, message: dict, room: str, exclude: WebSocket = None):
         """Broadcast a message to all connections in a room."""
         if room in self.rooms:
-            for connection in self.rooms[room]:
-                if connection != exclude:
-                    try:
-                        await connection.send_json(message)
-                    except:
-                        # Connection might be closed
-                        pass
+            await self._fan_out(
+                message,
+                [connection for connection in self.rooms[room] if connection != exclude]
+            )
+    
+    async def _fan_out(self, message: dict, connections: Iterable[WebSocket]):
+        """Serialize a message once and send it to every connection concurrently."""
+        # Same text frame send_json would produce, without re-encoding per peer
+        payload = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+        connections = list(connections)
+        results = await asyncio.gather(
+            *(connection.send_text(payload) for connection in connections),
+            return_exceptions=True
+        )
+        # A failed send means the peer is gone; drop it so it is not retried forever
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                self.disconnect(connection)
     
     def get_room_connections(self, room: str) -> List[WebSocket]:
         """Get all connections in a room."""
@@ -3,19 +3,33 @@ High-performance Mermaid diagram rendering with multiple output formats.
 """
 import asyncio
 import base64
+import hashlib
 import io
 import json
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, asdict
+import logging
+import os
+import shutil
+import threading
+import types
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Any, Mapping, Optional, List, Tuple
+from dataclasses import dataclass, asdict, field, replace
+from functools import lru_cache
 from enum import Enum
 from pathlib import Path
 import tempfile
 
-from playwright.async_api import async_playwright, Browser, Page
+from playwright.async_api import async_playwright, BrowserContext, Page, Route
 from PIL import Image
 import cairosvg
 
 
+logger = logging.getLogger(__name__)
+
+# Mermaid release loaded from the CDN; part of every cache key so bumps invalidate
+MERMAID_VERSION = "10"
+
+
 class Theme(Enum):
     """Available Mermaid themes."""
     DEFAULT = "default"
@@ -63,22 +77,148 @@ class RenderConfig:
         return config
 
 
+def _user_cache_dir() -> Path:
+    """Sailor's directory under the user's cache home (XDG_CACHE_HOME or ~/.cache)."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "sailor"
+
+
+# Shared read-only metadata for results that carry none, so they allocate nothing
+EMPTY_METADATA: Mapping[str, Any] = types.MappingProxyType({})
+
+
 @dataclass
 class RenderResult:
     """Result of rendering operation."""
     success: bool
     format: OutputFormat
-    data: Optional[str] = None  # Base64 encoded
+    data: Optional[str] = None  # Base64 encoded, or plain text if metadata["encoding"] == "utf-8"
     error: Optional[str] = None
-    metadata: Dict[str, Any] = None
+    metadata: Mapping[str, Any] = field(default_factory=lambda: EMPTY_METADATA)
     
     def to_bytes(self) -> Optional[bytes]:
-        """Get raw bytes from base64 data."""
+        """Get raw bytes from base64 or text data."""
         if self.data:
+            if self.metadata.get("encoding") == "utf-8":
+                return self.data.encode('utf-8')
             return base64.b64decode(self.data)
         return None
 
 
+class DiskCache:
+    """
+    Content-addressed render cache on disk, so restarts and CI runs start warm.
+    
+    Each entry is the raw output file plus a JSON sidecar with its metadata,
+    both written atomically. Failures to read or write are treated as misses.
+    Beyond max_entries the oldest entries are pruned.
+    """
+    
+    def __init__(self, directory: Path, max_entries: int = 1000):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+    
+    @classmethod
+    def from_env(cls) -> Optional['DiskCache']:
+        """Cache in SAILOR_CACHE_DIR, or None when it is unset; the cache is opt-in."""
+        directory = os.environ.get("SAILOR_CACHE_DIR")
+        if not directory:
+            return None
+        return cls(Path(directory))
+    
+    def _path(self, key: bytes, output_format: OutputFormat) -> Path:
+        """Output file for a cache key, e.g. ``<sha256>.svg``."""
+        return self.directory / f"{key.hex()}.{output_format.value}"
+    
+    @staticmethod
+    def _sidecar(path: Path) -> Path:
+        """Metadata file stored next to an output file."""
+        return path.with_name(path.name + ".json")
+    
+    def get(self, key: bytes, output_format: OutputFormat) -> Optional[RenderResult]:
+        """Load a cached render, or None if it isn't on disk."""
+        path = self._path(key, output_format)
+        try:
+            raw = path.read_bytes()
+            metadata = json.loads(self._sidecar(path).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        
+        if metadata.get("encoding") == "utf-8":
+            data = raw.decode('utf-8')
+        else:
+            data = base64.b64encode(raw).decode('ascii')
+        return RenderResult(
+            success=True,
+            format=output_format,
+            data=data,
+            metadata=metadata
+        )
+    
+    def put(self, key: bytes, result: RenderResult):
+        """Store a successful render; the output file lands last so it marks a complete entry."""
+        if not result.success or not result.data:
+            return
+        path = self._path(key, result.format)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._write_atomic(
+                self._sidecar(path),
+                json.dumps(dict(result.metadata)).encode('utf-8')
+            )
+            self._write_atomic(path, result.to_bytes())
+            self._prune()
+        except OSError:
+            pass  # The disk cache is best effort; the render itself succeeded
+    
+    def _entries(self) -> List[Path]:
+        """Output files currently in the cache."""
+        suffixes = {f".{f.value}" for f in OutputFormat}
+        return [p for p in self.directory.iterdir() if p.suffix in suffixes]
+    
+    def _remove(self, path: Path):
+        """Delete an entry; the output file goes first so a half-removed entry is a miss."""
+        for target in (path, self._sidecar(path)):
+            try:
+                target.unlink()
+            except FileNotFoundError:
+                pass
+    
+    def _prune(self):
+        """Delete the oldest entries beyond max_entries."""
+        entries = self._entries()
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        entries.sort(key=lambda p: p.stat().st_mtime)
+        for path in entries[:excess]:
+            self._remove(path)
+    
+    def clear(self):
+        """Delete every cached entry."""
+        try:
+            for path in self._entries():
+                self._remove(path)
+        except OSError:
+            pass
+    
+    @staticmethod
+    def _write_atomic(path: Path, payload: bytes):
+        """Write to a temp file beside the target, then rename it into place."""
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class _RenderAbandoned(Exception):
+    """Raised to coalesced waiters when the render they joined was cancelled."""
+
+
 class MermaidRenderer:
     """
     High-performance Mermaid diagram renderer using Playwright.
@@ -86,22 +226,85 @@ class MermaidRenderer:
     Supports multiple output formats and advanced styling options.
     """
     
-    _instance: Optional['MermaidRenderer'] = None
-    _browser: Optional[Browser] = None
-    _lock = asyncio.Lock()
+    # mermaid.min.js body, fetched from the CDN once and served from memory after
+    _mermaid_js: Optional[bytes] = None
     
-    def __new__(cls):
-        """Ensure singleton instance."""
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    # Seconds without a render before the browser is shut down to free its memory
+    IDLE_SECS = 300
+    
+    # Fixed for every page, so set once at launch rather than per render
+    _VIEWPORT = {"width": 1920, "height": 1080}
+    _CHROMIUM_ARGS = (
+        '--disable-dev-shm-usage',
+        '--disable-gpu-compositing',
+        '--disable-features=TranslateUI',
+        '--disable-extensions',
+        '--disable-background-networking',
+        '--disable-blink-features=AutomationControlled',
+    )
+    # Rendered code comes from API clients, so the process sandbox stays on unless
+    # SAILOR_CHROMIUM_NO_SANDBOX=1 opts out for containers that cannot provide it;
+    # Chromium only runs without its zygote when the sandbox is off
+    _NO_SANDBOX_ARGS = (
+        '--no-sandbox',
+        '--disable-setuid-sandbox',
+        '--no-zygote',
+    )
+    
+    # Page shell shared by every render; _create_html fills in the __SENTINEL__ tokens
+    _HTML_TEMPLATE = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <style>
+                body {
+                    margin: 0;
+                    padding: __PADDING__px;
+                    background: __BACKGROUND__;
+                    display: flex;
+                    justify-content: center;
+                    align-items: center;
+                    min-height: 100vh;
+                    font-family: __FONT_FAMILY__;
+                }
+                #diagram {
+                    transform: scale(__SCALE__);
+                    transform-origin: center;
+                }
+            </style>
+            <script src="https://cdn.jsdelivr.net/npm/mermaid@__MERMAID_VERSION__/dist/mermaid.min.js"></script>
+        </head>
+        <body>
+            <div id="diagram" class="mermaid">
+__CODE__
+            </div>
+            <script>
+                mermaid.initialize(__MERMAID_CONFIG__);
+                window.__sailorReady = true;
+                __RUN__
+            </script>
+        </body>
+        </html>
+        """
     
     def __init__(self):
-        """Initialize renderer."""
-        if not hasattr(self, '_initialized'):
-            self._initialized = True
-            self._page_pool: List[Page] = []
-            self._max_pool_size = 5
+        """Initialize renderer. Use get_renderer() to share one instance per process."""
+        self._playwright = None
+        # Created on first use by _init_loop_primitives, inside the running loop
+        self._browser_lock: Optional[asyncio.Lock] = None
+        self._context: Optional[BrowserContext] = None
+        self._temp_profile: Optional[str] = None
+        self._page_pool: Optional["asyncio.Queue[Page]"] = None
+        self._max_pool_size = 5
+        self._cache: "OrderedDict[bytes, RenderResult]" = OrderedDict()
+        self._max_cache_size = 256
+        self._inflight: Dict[bytes, "asyncio.Future[RenderResult]"] = {}
+        self._disk_cache = DiskCache.from_env()
+        self._pages_out = 0
+        self._idle_timer: Optional[asyncio.TimerHandle] = None
+        # Held until it finishes so the event loop's weak reference isn't the only one
+        self._idle_task: Optional["asyncio.Task[None]"] = None
     
     async def __aenter__(self):
         """Async context manager entry."""
@@ -109,38 +312,142 @@ class MermaidRenderer:
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit."""
-        # Keep browser alive for reuse
-        pass
+        """
+        Async context manager exit.
+        
+        Closes privately constructed renderers only; the shared get_renderer()
+        instance stays up for its other callers.
+        """
+        if self is not _renderer_instance:
+            await self.close()
+    
+    def _init_loop_primitives(self):
+        """
+        Create the browser lock and page pool on first use.
+        
+        The shared renderer is constructed at import time, before any event
+        loop runs. Before Python 3.10, asyncio primitives bind to the loop that
+        is current when they are created, so they are built here instead, from
+        a coroutine running in the serving loop.
+        """
+        if self._browser_lock is None:
+            self._browser_lock = asyncio.Lock()
+            self._page_pool = asyncio.Queue()
     
     async def _ensure_browser(self):
-        """Ensure browser is initialized."""
-        async with self._lock:
-            if self._browser is None:
-                playwright = await async_playwright().start()
-                self._browser = await playwright.chromium.launch(
-                    headless=True,
-                    args=['--disable-blink-features=AutomationControlled']
-                )
+        """Ensure browser, shared context and page pool are initialized."""
+        if self._context is not None:
+            return
+        self._init_loop_primitives()
+        async with self._browser_lock:
+            # Re-check: another coroutine may have launched it while we waited
+            if self._context is None:
+                self._playwright = await async_playwright().start()
+                self._context = await self._launch_context()
+                await self._context.route("**/mermaid*.js", self._serve_mermaid_js)
+                # The persistent context opens with a blank page; pool it too
+                pages = list(self._context.pages)
+                while len(pages) < self._max_pool_size:
+                    pages.append(await self._context.new_page())
+                for page in pages:
+                    self._page_pool.put_nowait(page)
+    
+    async def _launch_context(self) -> BrowserContext:
+        """Launch Chromium with a persistent profile so its disk cache survives restarts."""
+        args = list(self._CHROMIUM_ARGS)
+        if os.environ.get("SAILOR_CHROMIUM_NO_SANDBOX") == "1":
+            args.extend(self._NO_SANDBOX_ARGS)
+        options = {
+            "headless": True,
+            "viewport": self._VIEWPORT,
+            "args": args,
+        }
+        # Per-user, so other users on the host can't pre-create or poison it
+        profile_dir = _user_cache_dir() / "chromium-profile"
+        try:
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            return await self._playwright.chromium.launch_persistent_context(
+                str(profile_dir), **options
+            )
+        except Exception:
+            # Chromium locks a profile to one process; fall back to a private
+            # one, which close() deletes
+            self._temp_profile = tempfile.mkdtemp(prefix="sailor-mermaid-profile-")
+            return await self._playwright.chromium.launch_persistent_context(
+                self._temp_profile, **options
+            )
+    
+    async def _serve_mermaid_js(self, route: Route):
+        """Fulfill Mermaid script requests in-process instead of hitting the CDN per render."""
+        if self._mermaid_js is None:
+            response = await route.fetch()
+            if not response.ok:
+                await route.fulfill(response=response)
+                return
+            MermaidRenderer._mermaid_js = await response.body()
+        await route.fulfill(
+            body=self._mermaid_js,
+            content_type="application/javascript"
+        )
     
     async def _get_page(self) -> Page:
-        """Get a page from the pool or create new one."""
-        await self._ensure_browser()
-        
-        if self._page_pool:
-            return self._page_pool.pop()
-        
-        page = await self._browser.new_page()
-        await page.set_viewport_size({"width": 1920, "height": 1080})
-        return page
+        """Get a page from the pool, waiting for one to be returned if all are busy."""
+        # Count the render as active first so an idle close can't slip in meanwhile
+        self._pages_out += 1
+        try:
+            await self._ensure_browser()
+            return await self._page_pool.get()
+        except BaseException:
+            self._release_page()
+            raise
     
     async def _return_page(self, page: Page):
-        """Return page to pool or close if pool is full."""
-        if len(self._page_pool) < self._max_pool_size:
-            await page.goto("about:blank")  # Clear page
-            self._page_pool.append(page)
-        else:
-            await page.close()
+        """Reset a page and hand it back to the pool, replacing it if it broke."""
+        try:
+            try:
+                await page.goto("about:blank")  # Clear page
+            except Exception:
+                await page.close()
+                if self._context is None:
+                    return  # close() ran while the page was out; nothing to replace
+                page = await self._context.new_page()
+            # Pages from before a close() belong to a browser that is gone
+            if page.context is self._context:
+                self._page_pool.put_nowait(page)
+        finally:
+            self._release_page()
+    
+    def _release_page(self):
+        """Mark a render finished, restarting the idle countdown once none are left."""
+        self._pages_out -= 1
+        if self._pages_out:
+            return
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        if self._context is None:
+            return  # No browser is running, so there is nothing to shut down
+        self._idle_timer = asyncio.get_running_loop().call_later(
+            self.IDLE_SECS, self._start_idle_close
+        )
+    
+    def _start_idle_close(self):
+        """Timer callback: run _close_if_idle in a task kept until it finishes."""
+        self._idle_timer = None
+        self._idle_task = asyncio.ensure_future(self._close_if_idle())
+        self._idle_task.add_done_callback(self._idle_close_done)
+    
+    def _idle_close_done(self, task: "asyncio.Task[None]"):
+        """Drop the finished idle-close task, logging it if it failed."""
+        if self._idle_task is task:
+            self._idle_task = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Idle browser shutdown failed", exc_info=task.exception())
+    
+    async def _close_if_idle(self):
+        """Shut the browser down unless a render started since the timer fired."""
+        if self._pages_out == 0:
+            await self.close()
     
     async def render(
         self,
@@ -162,42 +469,71 @@ class MermaidRenderer:
         if config is None:
             config = RenderConfig()
         
+        # Identical input always renders identically, so serve repeats from cache
+        key = self._cache_key(code, config, output_format)
+        while True:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return replace(cached, metadata=dict(cached.metadata))
+            
+            # Coalesce concurrent identical renders onto the one already running
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                result = await asyncio.shield(inflight)
+            except _RenderAbandoned:
+                continue  # Its caller was cancelled; start or join a fresh render
+            return replace(result, metadata=dict(result.metadata))
+        
+        future = asyncio.get_running_loop().create_future()
+        # Mark a failure as retrieved even when nobody else was waiting on it
+        future.add_done_callback(lambda f: f.exception())
+        self._inflight[key] = future
+        try:
+            # Fall back to the disk cache before paying for a browser render
+            result = await self._disk_get(key, output_format)
+            if result is None:
+                result = await self._render_page(code, config, output_format)
+                await self._disk_put(key, result)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            self._remember(key, result)
+            future.set_result(result)
+        finally:
+            del self._inflight[key]
+            if not future.done():
+                # Cancelled here; the waiters weren't, so one of them takes over
+                future.set_exception(_RenderAbandoned())
+        return replace(result, metadata=dict(result.metadata))
+    
+    async def _render_page(
+        self,
+        code: str,
+        config: RenderConfig,
+        output_format: OutputFormat
+    ) -> RenderResult:
+        """Render on a pooled page, reporting failures as an unsuccessful result."""
         page = None
         try:
             page = await self._get_page()
+            dimensions = await self._load_diagram(page, code, config)
             
-            # Create HTML with Mermaid
-            html_content = self._create_html(code, config)
-            
-            # Load the HTML
-            await page.set_content(html_content, wait_until="networkidle")
-            
-            # Wait for rendering
-            await page.wait_for_selector("#diagram svg", timeout=10000)
+            # SVG is already text; base64 would only inflate it by a third
+            if output_format == OutputFormat.SVG:
+                return await self._render_svg(page)
             
-            # Get diagram dimensions
-            dimensions = await page.evaluate("""
-                () => {
-                    const svg = document.querySelector('#diagram svg');
-                    const rect = svg.getBoundingClientRect();
-                    return {
-                        width: rect.width,
-                        height: rect.height
-                    };
-                }
-            """)
-            
-            # Render based on format
-            if output_format == OutputFormat.PNG:
-                result = await self._render_png(page, dimensions, config)
-            elif output_format == OutputFormat.SVG:
-                result = await self._render_svg(page)
-            elif output_format == OutputFormat.PDF:
-                result = await self._render_pdf(page, dimensions)
-            elif output_format == OutputFormat.WEBP:
-                result = await self._render_webp(page, dimensions, config)
-            else:
-                raise ValueError(f"Unsupported format: {output_format}")
+            buffer = io.BytesIO()
+            metadata = await self._write_output(page, dimensions, config, output_format, buffer)
+            result = RenderResult(
+                success=True,
+                format=output_format,
+                data=base64.b64encode(buffer.getbuffer()).decode('ascii'),
+                metadata=metadata
+            )
             
             return result
             
@@ -211,51 +547,184 @@ class MermaidRenderer:
             if page:
                 await self._return_page(page)
     
-    def _create_html(self, code: str, config: RenderConfig) -> str:
-        """Create HTML page with Mermaid diagram."""
-        mermaid_config = json.dumps(config.to_mermaid_config())
+    async def render_to(
+        self,
+        code: str,
+        out: BinaryIO,
+        config: RenderConfig = None,
+        output_format: OutputFormat = OutputFormat.PNG
+    ) -> RenderResult:
+        """
+        Render Mermaid diagram straight into a binary stream.
         
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{
-                    margin: 0;
-                    padding: {config.padding}px;
-                    background: {config.background};
-                    display: flex;
-                    justify-content: center;
-                    align-items: center;
-                    min-height: 100vh;
-                    font-family: {config.font_family or 'Arial, sans-serif'};
-                }}
-                #diagram {{
-                    transform: scale({config.scale});
-                    transform-origin: center;
-                }}
-            </style>
-            <script src="https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.min.js"></script>
-        </head>
-        <body>
-            <div id="diagram" class="mermaid">
-{code}
-            </div>
-            <script>
-                mermaid.initialize({mermaid_config});
-            </script>
-        </body>
-        </html>
+        Skips base64 entirely, for callers that write the image to a file
+        or response body anyway.
+        
+        Args:
+            code: Mermaid diagram code
+            out: Writable binary stream that receives the raw output
+            config: Rendering configuration
+            output_format: Desired output format
+            
+        Returns:
+            RenderResult with metadata but no data
+        """
+        if config is None:
+            config = RenderConfig()
+        
+        cached = self._cache.get(self._cache_key(code, config, output_format))
+        if cached is not None:
+            out.write(cached.to_bytes())
+            return replace(cached, data=None, metadata=dict(cached.metadata))
+        
+        page = None
+        try:
+            page = await self._get_page()
+            dimensions = await self._load_diagram(page, code, config)
+            metadata = await self._write_output(page, dimensions, config, output_format, out)
+            return RenderResult(
+                success=True,
+                format=output_format,
+                metadata=metadata
+            )
+        except Exception as e:
+            return RenderResult(
+                success=False,
+                format=output_format,
+                error=str(e)
+            )
+        finally:
+            if page:
+                await self._return_page(page)
+    
+    async def _load_diagram(self, page: Page, code: str, config: RenderConfig) -> Dict[str, float]:
+        """Render the diagram on the page and return its dimensions."""
+        # Create HTML with Mermaid
+        html_content = self._create_html(code, config)
+        
+        # Load the HTML; only the rendered SVG matters, not page load events
+        await page.set_content(html_content, wait_until="commit")
+        
+        # Wait for mermaid.run() to settle, checked every animation frame
+        done = await page.wait_for_function(
+            "() => window.__mermaidDone", polling="raf", timeout=10000
+        )
+        status = await done.json_value()
+        if "error" in status:
+            raise RuntimeError(f"Mermaid failed to render diagram: {status['error']}")
+        
+        # Get diagram dimensions
+        return await page.evaluate("""
+            () => {
+                const svg = document.querySelector('#diagram svg');
+                const rect = svg.getBoundingClientRect();
+                return {
+                    width: rect.width,
+                    height: rect.height
+                };
+            }
+        """)
+    
+    @staticmethod
+    def _cache_key(
+        code: str,
+        config: RenderConfig,
+        output_format: OutputFormat,
+        mode: str = "page"
+    ) -> bytes:
         """
+        Content-address a render by its source, configuration, format and mode.
+        
+        The mode separates outputs that differ in markup for the same input:
+        "page" renders read the SVG from the page, "batch" renders take it
+        from mermaid.render() with batch-local element ids.
+        """
+        payload = f"{MERMAID_VERSION}\x00{code}\x00{config!r}\x00{output_format!r}\x00{mode}"
+        return hashlib.sha256(payload.encode('utf-8')).digest()
+    
+    async def _disk_get(self, key: bytes, output_format: OutputFormat) -> Optional[RenderResult]:
+        """Look a render up in the disk cache, if one is configured."""
+        if self._disk_cache is None:
+            return None
+        return await asyncio.to_thread(self._disk_cache.get, key, output_format)
+    
+    async def _disk_put(self, key: bytes, result: RenderResult):
+        """Store a render in the disk cache, if one is configured."""
+        if self._disk_cache is not None:
+            await asyncio.to_thread(self._disk_cache.put, key, result)
     
-    async def _render_png(
+    def _remember(self, key: bytes, result: RenderResult):
+        """Store a successful result in the LRU cache."""
+        if result.success:
+            self._cache[key] = result
+            if len(self._cache) > self._max_cache_size:
+                self._cache.popitem(last=False)
+    
+    def _create_html(self, code: str, config: RenderConfig, start_on_load: bool = True) -> str:
+        """Create HTML page with Mermaid diagram."""
+        prefix, suffix = self._html_shell(
+            config.theme,
+            config.style,
+            config.background,
+            config.padding,
+            config.font_family,
+            config.scale,
+            start_on_load
+        )
+        return prefix + code + suffix
+    
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def _html_shell(
+        theme: Theme,
+        style: RenderStyle,
+        background: str,
+        padding: int,
+        font_family: Optional[str],
+        scale: float,
+        start_on_load: bool
+    ) -> Tuple[str, str]:
+        """Build the page around the diagram code, split where the code goes."""
+        config = RenderConfig(
+            theme=theme,
+            style=style,
+            background=background,
+            padding=padding,
+            font_family=font_family,
+            scale=scale
+        )
+        # Run Mermaid explicitly so completion (or failure) sets a flag render() can wait on
+        options = config.to_mermaid_config()
+        options["startOnLoad"] = False
+        mermaid_config = json.dumps(options)
+        run_script = (
+            "mermaid.run().then("
+            "() => { window.__mermaidDone = {ok: true}; }, "
+            "(e) => { window.__mermaidDone = {error: String((e && e.message) || e)}; });"
+        ) if start_on_load else ""
+        
+        def fill(part: str) -> str:
+            return (
+                part
+                .replace("__MERMAID_VERSION__", MERMAID_VERSION)
+                .replace("__PADDING__", str(padding))
+                .replace("__BACKGROUND__", background)
+                .replace("__FONT_FAMILY__", font_family or 'Arial, sans-serif')
+                .replace("__SCALE__", str(scale))
+                .replace("__MERMAID_CONFIG__", mermaid_config)
+                .replace("__RUN__", run_script)
+            )
+        
+        prefix, _, suffix = MermaidRenderer._HTML_TEMPLATE.partition("__CODE__")
+        return fill(prefix), fill(suffix)
+    
+    async def _capture_image(
         self,
         page: Page,
         dimensions: Dict[str, float],
         config: RenderConfig
-    ) -> RenderResult:
-        """Render to PNG format."""
+    ) -> Tuple[Image.Image, Dict[str, Any]]:
+        """Screenshot the diagram and apply post-processing, returning the decoded image."""
         # Calculate viewport with padding
         width = int(dimensions['width'] * config.scale + config.padding * 2)
         height = int(dimensions['height'] * config.scale + config.padding * 2)
@@ -288,97 +757,79 @@ class MermaidRenderer:
                     new_data.append(item)
             img.putdata(new_data)
         
-        # Save optimized image
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG", optimize=True)
-        buffer.seek(0)
+        return img, {
+            "width": width,
+            "height": height,
+            "scale": config.scale
+        }
+    
+    async def _write_output(
+        self,
+        page: Page,
+        dimensions: Dict[str, float],
+        config: RenderConfig,
+        output_format: OutputFormat,
+        out: BinaryIO
+    ) -> Dict[str, Any]:
+        """Write the rendered diagram to a binary stream and return its metadata."""
+        if output_format == OutputFormat.PNG:
+            img, metadata = await self._capture_image(page, dimensions, config)
+            img.save(out, format="PNG", optimize=True)
+            return metadata
         
-        return RenderResult(
-            success=True,
-            format=OutputFormat.PNG,
-            data=base64.b64encode(buffer.read()).decode(),
-            metadata={
-                "width": width,
-                "height": height,
-                "scale": config.scale
+        if output_format == OutputFormat.WEBP:
+            img, metadata = await self._capture_image(page, dimensions, config)
+            img.save(out, format="WEBP", quality=95, method=6)
+            return metadata
+        
+        if output_format == OutputFormat.PDF:
+            out.write(await page.pdf(
+                format="A4",
+                print_background=True,
+                margin={
+                    "top": "20px",
+                    "right": "20px",
+                    "bottom": "20px",
+                    "left": "20px"
+                }
+            ))
+            return {
+                "page_format": "A4"
             }
-        )
+        
+        if output_format == OutputFormat.SVG:
+            svg_content = await self._svg_markup(page)
+            out.write(svg_content.encode('utf-8'))
+            return {
+                "raw_size": len(svg_content),
+                "encoding": "utf-8"
+            }
+        
+        raise ValueError(f"Unsupported format: {output_format}")
     
-    async def _render_svg(self, page: Page) -> RenderResult:
-        """Render to SVG format."""
-        svg_content = await page.evaluate("""
+    async def _svg_markup(self, page: Page) -> str:
+        """Get the rendered SVG element's markup."""
+        return await page.evaluate("""
             () => {
                 const svg = document.querySelector('#diagram svg');
                 return svg.outerHTML;
             }
         """)
-        
-        # Encode as base64
-        svg_bytes = svg_content.encode('utf-8')
+    
+    async def _render_svg(self, page: Page) -> RenderResult:
+        """Render to SVG format."""
+        svg_content = await self._svg_markup(page)
         
         return RenderResult(
             success=True,
             format=OutputFormat.SVG,
-            data=base64.b64encode(svg_bytes).decode(),
+            data=svg_content,
             metadata={
-                "raw_size": len(svg_content)
+                "raw_size": len(svg_content),
+                "encoding": "utf-8"
             }
         )
     
-    async def _render_pdf(self, page: Page, dimensions: Dict[str, float]) -> RenderResult:
-        """Render to PDF format."""
-        pdf_bytes = await page.pdf(
-            format="A4",
-            print_background=True,
-            margin={
-                "top": "20px",
-                "right": "20px",
-                "bottom": "20px",
-                "left": "20px"
-            }
-        )
-        
-        return RenderResult(
-            success=True,
-            format=OutputFormat.PDF,
-            data=base64.b64encode(pdf_bytes).decode(),
-            metadata={
-                "page_format": "A4"
-            }
-        )
-    
-    async def _render_webp(
-        self,
-        page: Page,
-        dimensions: Dict[str, float],
-        config: RenderConfig
-    ) -> RenderResult:
-        """Render to WebP format."""
-        # First get PNG
-        png_result = await self._render_png(page, dimensions, config)
-        
-        if not png_result.success:
-            return RenderResult(
-                success=False,
-                format=OutputFormat.WEBP,
-                error="Failed to render base PNG"
-            )
-        
-        # Convert PNG to WebP
-        png_bytes = base64.b64decode(png_result.data)
-        img = Image.open(io.BytesIO(png_bytes))
-        
-        buffer = io.BytesIO()
-        img.save(buffer, format="WEBP", quality=95, method=6)
-        buffer.seek(0)
-        
-        return RenderResult(
-            success=True,
-            format=OutputFormat.WEBP,
-            data=base64.b64encode(buffer.read()).decode(),
-            metadata=png_result.metadata
-        )
-    
     async def render_batch(
         self,
         diagrams: List[tuple[str, RenderConfig]],
@@ -387,36 +838,158 @@ class MermaidRenderer:
         """
         Render multiple diagrams efficiently.
         
+        SVG batches are rendered in a single page per distinct config by
+        calling mermaid.render() for each diagram in one evaluate() trip.
+        Other formats need a screenshot per diagram and render concurrently.
+        
         Args:
             diagrams: List of (code, config) tuples
             output_format: Output format for all diagrams
             
         Returns:
-            List of RenderResults
+            List of RenderResults, in input order
         """
-        tasks = [
-            self.render(code, config, output_format)
-            for code, config in diagrams
-        ]
+        if output_format != OutputFormat.SVG:
+            tasks = [
+                self.render(code, config, output_format)
+                for code, config in diagrams
+            ]
+            return await asyncio.gather(*tasks)
+        
+        results: List[Optional[RenderResult]] = [None] * len(diagrams)
+        groups: Dict[str, List[int]] = {}
+        for index, (code, config) in enumerate(diagrams):
+            config = config or RenderConfig()
+            key = self._cache_key(code, config, output_format, mode="batch")
+            cached = self._cache.get(key)
+            if cached is None:
+                cached = await self._disk_get(key, output_format)
+                if cached is not None:
+                    self._remember(key, cached)
+            if cached is not None:
+                results[index] = replace(cached, metadata=dict(cached.metadata))
+            else:
+                groups.setdefault(repr(config), []).append(index)
+        
+        async def render_group(indices: List[int]):
+            config = diagrams[indices[0]][1] or RenderConfig()
+            codes = [diagrams[i][0] for i in indices]
+            rendered = await self._render_svg_batch(codes, config)
+            for i, code, result in zip(indices, codes, rendered):
+                key = self._cache_key(code, config, output_format, mode="batch")
+                self._remember(key, result)
+                await self._disk_put(key, result)
+                results[i] = replace(result, metadata=dict(result.metadata))
+        
+        await asyncio.gather(*(render_group(indices) for indices in groups.values()))
+        return results
+    
+    async def _render_svg_batch(self, codes: List[str], config: RenderConfig) -> List[RenderResult]:
+        """Render several diagrams to SVG on one pooled page."""
+        page = None
+        try:
+            page = await self._get_page()
+            await page.set_content(self._create_html("", config, start_on_load=False), wait_until="commit")
+            # mermaid exists once the head script runs, but the theme and config
+            # only apply after the body script's initialize() call
+            await page.wait_for_function("() => window.__sailorReady === true", timeout=10000)
+            outputs = await page.evaluate("""
+                async (codes) => {
+                    const out = [];
+                    for (let i = 0; i < codes.length; i++) {
+                        try {
+                            const { svg } = await mermaid.render('batch-' + i, codes[i]);
+                            out.push({ svg });
+                        } catch (e) {
+                            out.push({ error: String((e && e.message) || e) });
+                        }
+                    }
+                    return out;
+                }
+            """, codes)
+        except Exception as e:
+            return [
+                RenderResult(success=False, format=OutputFormat.SVG, error=str(e))
+                for _ in codes
+            ]
+        finally:
+            if page:
+                await self._return_page(page)
         
-        return await asyncio.gather(*tasks)
+        return [
+            RenderResult(
+                success=True,
+                format=OutputFormat.SVG,
+                data=output["svg"],
+                metadata={
+                    "raw_size": len(output["svg"]),
+                    "encoding": "utf-8"
+                }
+            ) if "svg" in output else RenderResult(
+                success=False,
+                format=OutputFormat.SVG,
+                error=output["error"]
+            )
+            for output in outputs
+        ]
+    
+    def clear_cache(self):
+        """Drop all cached render results, in memory and on disk."""
+        self._cache.clear()
+        if self._disk_cache is not None:
+            self._disk_cache.clear()
+    
+    async def close(self):
+        """Shut down the browser; the next render starts it again."""
+        self._init_loop_primitives()
+        async with self._browser_lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            
+            # Detach before awaiting so a render arriving meanwhile relaunches
+            context, self._context = self._context, None
+            pages = []
+            while not self._page_pool.empty():
+                pages.append(self._page_pool.get_nowait())
+            
+            # Close all pages in pool
+            for page in pages:
+                await page.close()
+            
+            # Closing the persistent context also shuts down the browser
+            if context:
+                await context.close()
+            
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+            
+            if self._temp_profile:
+                await asyncio.to_thread(shutil.rmtree, self._temp_profile, ignore_errors=True)
+                self._temp_profile = None
     
     async def cleanup(self):
         """Clean up resources."""
-        # Close all pages in pool
-        for page in self._page_pool:
-            await page.close()
-        self._page_pool.clear()
-        
-        # Close browser
-        if self._browser:
-            await self._browser.close()
-            self._browser = None
+        await self.close()
     
     @classmethod
     async def get_instance(cls) -> 'MermaidRenderer':
-        """Get or create renderer instance."""
-        if cls._instance is None:
-            cls._instance = cls()
-            await cls._instance._ensure_browser()
-        return cls._instance
\ No newline at end of file
+        """Get the shared renderer instance with its browser started."""
+        instance = get_renderer()
+        await instance._ensure_browser()
+        return instance
+
+
+_renderer_instance: Optional[MermaidRenderer] = None
+_renderer_instance_lock = threading.Lock()
+
+
+def get_renderer() -> MermaidRenderer:
+    """Get or create the process-wide renderer instance."""
+    global _renderer_instance
+    if _renderer_instance is None:
+        with _renderer_instance_lock:
+            if _renderer_instance is None:
+                _renderer_instance = MermaidRenderer()
+    return _renderer_instance
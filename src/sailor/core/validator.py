@@ -2,9 +2,13 @@
 Mermaid diagram validation with comprehensive error reporting.
 """
 import re
+import sys
+import threading
+from collections import OrderedDict
 from typing import Tuple, Optional, List, Dict, Any
-from dataclasses import dataclass
-from enum import Enum
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from enum import Enum, IntEnum
 
 
 class DiagramType(Enum):
@@ -25,17 +29,34 @@ class DiagramType(Enum):
     C4CONTEXT = "C4Context"
 
 
-@dataclass
+class Severity(IntEnum):
+    """Validation issue severity, ordered from most to least severe."""
+    # Start at 1 so every severity is truthy
+    ERROR = 1
+    WARNING = 2
+    INFO = 3
+    
+    @property
+    def label(self) -> str:
+        """Lowercase name used in API and tool responses."""
+        return self.name.lower()
+
+
+# Slotted dataclasses need Python 3.10; older interpreters keep a per-instance __dict__
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class ValidationError:
     """Structured validation error."""
     line: Optional[int]
     column: Optional[int]
     message: str
-    severity: str = "error"  # error, warning, info
+    severity: Severity = Severity.ERROR
     suggestion: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ValidationResult:
     """Result of diagram validation."""
     is_valid: bool
@@ -50,22 +71,51 @@ class MermaidValidator:
     Comprehensive Mermaid diagram validator with detailed error reporting.
     """
     
-    # Diagram type patterns
-    DIAGRAM_PATTERNS = {
-        DiagramType.FLOWCHART: re.compile(r'^\s*(graph|flowchart)\s+(TB|TD|BT|RL|LR)', re.MULTILINE),
-        DiagramType.SEQUENCE: re.compile(r'^\s*sequenceDiagram', re.MULTILINE),
-        DiagramType.CLASS: re.compile(r'^\s*classDiagram', re.MULTILINE),
-        DiagramType.STATE: re.compile(r'^\s*stateDiagram(-v2)?', re.MULTILINE),
-        DiagramType.ER: re.compile(r'^\s*erDiagram', re.MULTILINE),
-        DiagramType.GANTT: re.compile(r'^\s*gantt', re.MULTILINE),
-        DiagramType.PIE: re.compile(r'^\s*pie(\s+title)?', re.MULTILINE),
-        DiagramType.JOURNEY: re.compile(r'^\s*journey', re.MULTILINE),
-        DiagramType.GITGRAPH: re.compile(r'^\s*gitGraph', re.MULTILINE),
-        DiagramType.MINDMAP: re.compile(r'^\s*mindmap', re.MULTILINE),
-        DiagramType.TIMELINE: re.compile(r'^\s*timeline', re.MULTILINE),
-        DiagramType.QUADRANT: re.compile(r'^\s*quadrantChart', re.MULTILINE),
-        DiagramType.REQUIREMENT: re.compile(r'^\s*requirementDiagram', re.MULTILINE),
-        DiagramType.C4CONTEXT: re.compile(r'^\s*C4Context', re.MULTILINE),
+    # Diagram type declarations as one alternation, one named group per DiagramType
+    # member; a single search finds the first declaration line instead of trying
+    # each type's pattern over the whole code in turn
+    DIAGRAM_PATTERN = re.compile(
+        r'^\s*(?:'
+        r'(?P<FLOWCHART>(?:graph|flowchart)\s+(?:TB|TD|BT|RL|LR))'
+        r'|(?P<SEQUENCE>sequenceDiagram)'
+        r'|(?P<CLASS>classDiagram)'
+        r'|(?P<STATE>stateDiagram)'
+        r'|(?P<ER>erDiagram)'
+        r'|(?P<GANTT>gantt)'
+        r'|(?P<PIE>pie)'
+        r'|(?P<JOURNEY>journey)'
+        r'|(?P<GITGRAPH>gitGraph)'
+        r'|(?P<MINDMAP>mindmap)'
+        r'|(?P<TIMELINE>timeline)'
+        r'|(?P<QUADRANT>quadrantChart)'
+        r'|(?P<REQUIREMENT>requirementDiagram)'
+        r'|(?P<C4CONTEXT>C4Context)'
+        r')',
+        re.MULTILINE
+    )
+    
+    # Declaration keywords by their first three characters, which are unique, so
+    # most declaration lines resolve with a dict lookup and a startswith; graph and
+    # flowchart still go through DIAGRAM_PATTERN for the direction check
+    DECLARATION_PREFIXES = {
+        keyword[:3]: (keyword, diagram_type)
+        for keyword, diagram_type in (
+            ('graph', DiagramType.FLOWCHART),
+            ('flowchart', DiagramType.FLOWCHART),
+            ('sequenceDiagram', DiagramType.SEQUENCE),
+            ('classDiagram', DiagramType.CLASS),
+            ('stateDiagram', DiagramType.STATE),
+            ('erDiagram', DiagramType.ER),
+            ('gantt', DiagramType.GANTT),
+            ('pie', DiagramType.PIE),
+            ('journey', DiagramType.JOURNEY),
+            ('gitGraph', DiagramType.GITGRAPH),
+            ('mindmap', DiagramType.MINDMAP),
+            ('timeline', DiagramType.TIMELINE),
+            ('quadrantChart', DiagramType.QUADRANT),
+            ('requirementDiagram', DiagramType.REQUIREMENT),
+            ('C4Context', DiagramType.C4CONTEXT),
+        )
     }
     
     # Common syntax patterns for validation
@@ -74,9 +124,28 @@ class MermaidValidator:
         'arrow': re.compile(r'-->|->|==>|=>|-.->|<-->|<->|<==>')
     }
     
-    def __init__(self):
+    BRACKET_PAIRS = (('[', ']'), ('(', ')'), ('{', '}'))
+    # ER crow's-foot cardinality markers such as o{ use bare braces
+    ER_BRACKET_PAIRS = (('[', ']'), ('(', ')'))
+    
+    # Metadata counting patterns
+    NODE_DEF_PATTERN = re.compile(r'\b\w+\[')
+    EDGE_COUNT_PATTERN = re.compile(r'-->|->|==>|-.->|<-->')
+    
+    # Sanitization patterns, applied in order
+    SCRIPT_TAG_PATTERN = re.compile(r'<script[^>]*>.*?</script>', re.IGNORECASE | re.DOTALL)
+    JS_URL_PATTERN = re.compile(r'javascript:', re.IGNORECASE)
+    EVENT_HANDLER_PATTERN = re.compile(r'on\w+\s*=', re.IGNORECASE)
+    HTML_TAG_PATTERN = re.compile(r'<(?!br\s*/?>)[^>]+>')
+    
+    def __init__(self, cache_size: int = 256):
         """Initialize the validator."""
         self._init_validation_rules()
+        # Validation is pure, so code seen again (live editing, repeated
+        # validate/render calls) is answered from an LRU keyed on the code
+        self._cache: "OrderedDict[Tuple[str, bool], ValidationResult]" = OrderedDict()
+        self._max_cache_size = cache_size
+        self._cache_lock = threading.Lock()
     
     def _init_validation_rules(self):
         """Initialize diagram-specific validation rules."""
@@ -87,16 +156,41 @@ class MermaidValidator:
             # Add more specific validators as needed
         }
     
-    def validate(self, code: str) -> ValidationResult:
+    def validate(self, code: str, fast_fail: bool = False) -> ValidationResult:
         """
         Validate Mermaid diagram code.
         
         Args:
             code: The Mermaid diagram code to validate
+            fast_fail: Stop at the first error, for callers that only need
+                validity or a single message (e.g. live editor feedback)
             
         Returns:
             ValidationResult with detailed error information
         """
+        key = (code, fast_fail)
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+        
+        if result is None:
+            result = self._validate(code, fast_fail)
+            with self._cache_lock:
+                self._cache[key] = result
+                if len(self._cache) > self._max_cache_size:
+                    self._cache.popitem(last=False)
+        
+        # Callers may extend the lists, so never hand out the cached containers
+        return replace(
+            result,
+            errors=list(result.errors),
+            warnings=list(result.warnings),
+            metadata=dict(result.metadata)
+        )
+    
+    def _validate(self, code: str, fast_fail: bool = False) -> ValidationResult:
+        """Validate code without consulting the cache."""
         if not code or not code.strip():
             return ValidationResult(
                 is_valid=False,
@@ -127,11 +221,11 @@ class MermaidValidator:
             )
         
         # Run generic validations
-        errors, warnings = self._run_generic_validations(code)
+        errors, warnings = self._run_generic_validations(code, diagram_type, fast_fail)
         
         # Run diagram-specific validations
-        if diagram_type in self.validation_rules:
-            specific_errors, specific_warnings = self.validation_rules[diagram_type](code)
+        if diagram_type in self.validation_rules and not (fast_fail and errors):
+            specific_errors, specific_warnings = self.validation_rules[diagram_type](code, fast_fail)
             errors.extend(specific_errors)
             warnings.extend(specific_warnings)
         
@@ -148,38 +242,84 @@ class MermaidValidator:
     
     def _detect_diagram_type(self, code: str) -> Optional[DiagramType]:
         """Detect the diagram type from code."""
-        for diagram_type, pattern in self.DIAGRAM_PATTERNS.items():
-            if pattern.search(code):
-                return diagram_type
-        return None
+        # The declaration is nearly always the first line, which stays the same
+        # while the body is edited, so that line is looked up first
+        newline = code.find('\n')
+        diagram_type = self._detect_declaration(code if newline < 0 else code[:newline])
+        if diagram_type is None:
+            # Blank lines, comments or front matter come before the declaration
+            match = self.DIAGRAM_PATTERN.search(code)
+            diagram_type = DiagramType[match.lastgroup] if match else None
+        return diagram_type
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _detect_declaration(line: str) -> Optional[DiagramType]:
+        """Match a single line against the diagram declarations."""
+        stripped = line.lstrip()
+        entry = MermaidValidator.DECLARATION_PREFIXES.get(stripped[:3])
+        if entry is None:
+            return None
+        keyword, diagram_type = entry
+        if diagram_type is DiagramType.FLOWCHART:
+            match = MermaidValidator.DIAGRAM_PATTERN.match(stripped)
+            return DiagramType.FLOWCHART if match else None
+        return diagram_type if stripped.startswith(keyword) else None
     
-    def _run_generic_validations(self, code: str) -> Tuple[List[ValidationError], List[ValidationError]]:
-        """Run validations common to all diagram types."""
+    def _run_generic_validations(
+        self, code: str, diagram_type: Optional[DiagramType] = None, fast_fail: bool = False
+    ) -> Tuple[List[ValidationError], List[ValidationError]]:
+        """
+        Run validations common to all diagram types.
+        
+        Brackets are checked by comparing whole-code totals per kind, so an
+        unclosed bracket on one line and a stray closing one on a later line
+        cancel out and go unreported. Each unbalanced kind reports a single
+        error, located by _find_unmatched_bracket.
+        """
         errors = []
         warnings = []
-        lines = code.split('\n')
+        
+        # Check bracket balance over the whole code; only a mismatched kind needs
+        # a per-line walk to find the offending bracket. Brackets may span lines
+        # (class bodies, composite states).
+        if diagram_type is DiagramType.ER:
+            bracket_pairs = self.ER_BRACKET_PAIRS
+        else:
+            bracket_pairs = self.BRACKET_PAIRS
+        for open_char, close_char in bracket_pairs:
+            # A kind that never appears is balanced; membership stops at the first hit
+            if open_char not in code and close_char not in code:
+                continue
+            if code.count(open_char) != code.count(close_char):
+                line, column = self._find_unmatched_bracket(code.split('\n'), open_char, close_char)
+                errors.append(ValidationError(
+                    line=line,
+                    column=column,
+                    message="Unmatched brackets",
+                    suggestion="Check bracket pairing"
+                ))
+                if fast_fail:
+                    return errors, warnings
+        
+        # The per-line checks can only fire when the code has a quote at all or
+        # is longer than one maximum-length line
+        check_quotes = '"' in code
+        if not check_quotes and len(code) <= 120:
+            return errors, warnings
         
         # Check for common syntax errors
-        for i, line in enumerate(lines, 1):
+        for i, line in enumerate(code.split('\n'), 1):
             # Check for unclosed quotes
-            if line.count('"') % 2 != 0:
+            if check_quotes and line.count('"') % 2 != 0:
                 errors.append(ValidationError(
                     line=i,
                     column=line.rfind('"') + 1,
                     message="Unclosed quote",
                     suggestion="Add closing quote"
                 ))
-            
-            # Check for unmatched brackets
-            open_brackets = line.count('[') + line.count('{') + line.count('(')
-            close_brackets = line.count(']') + line.count('}') + line.count(')')
-            if open_brackets != close_brackets:
-                errors.append(ValidationError(
-                    line=i,
-                    column=len(line),
-                    message="Unmatched brackets",
-                    suggestion="Check bracket pairing"
-                ))
+                if fast_fail:
+                    return errors, warnings
             
             # Warn about very long lines
             if len(line) > 120:
@@ -187,13 +327,29 @@ class MermaidValidator:
                     line=i,
                     column=120,
                     message="Line exceeds recommended length",
-                    severity="warning",
+                    severity=Severity.WARNING,
                     suggestion="Consider breaking into multiple lines"
                 ))
         
         return errors, warnings
     
-    def _validate_flowchart(self, code: str) -> Tuple[List[ValidationError], List[ValidationError]]:
+    @staticmethod
+    def _find_unmatched_bracket(lines: List[str], open_char: str, close_char: str) -> Tuple[int, int]:
+        """Locate the first stray closing bracket, else the last unclosed opening one."""
+        unclosed = []
+        for i, line in enumerate(lines, 1):
+            if open_char not in line and close_char not in line:
+                continue
+            for column, char in enumerate(line, 1):
+                if char == open_char:
+                    unclosed.append((i, column))
+                elif char == close_char:
+                    if not unclosed:
+                        return i, column
+                    unclosed.pop()
+        return unclosed[-1]
+    
+    def _validate_flowchart(self, code: str, fast_fail: bool = False) -> Tuple[List[ValidationError], List[ValidationError]]:
         """Validate flowchart-specific syntax."""
         errors = []
         warnings = []
@@ -203,24 +359,35 @@ class MermaidValidator:
         lines = code.split('\n')
         
         for i, line in enumerate(lines[1:], 2):  # Skip diagram declaration
+            # Comment lines hold no edges, however much they look like one; the
+            # membership test spares most lines the lstrip copy
+            if '%%' in line and line.lstrip().startswith('%%'):
+                continue
+            
             # Simple node detection (this is a simplified version)
             if '-->' in line or '-.->' in line:
-                parts = re.split(r'-->|-.->', line)
-                if len(parts) >= 2:
-                    source = parts[0].strip().split('[')[0].strip()
-                    target = parts[1].strip().split('[')[0].strip()
-                    
-                    # Validate node IDs
-                    for node_id in [source, target]:
-                        if node_id and not self.NODE_ID_PATTERN.match(node_id):
-                            errors.append(ValidationError(
-                                line=i,
-                                column=line.find(node_id) + 1,
-                                message=f"Invalid node ID: '{node_id}'",
-                                suggestion="Node IDs must start with a letter and contain only letters, numbers, and underscores"
-                            ))
-                    
-                    nodes.update([source, target])
+                # Literal arrows only, so plain string operations beat the regex engine;
+                # only the first edge's endpoints are checked, so stop after two arrows
+                head, _, tail = line.replace('-.->', '-->').partition('-->')
+                # Longer links such as '--->' leave dashes behind on the source side
+                source = head.rstrip(' -.').partition('[')[0].strip()
+                target = tail.partition('-->')[0].partition('[')[0].strip()
+                
+                # Validate node IDs
+                for node_id in (source, target):
+                    if node_id and not self._is_valid_node_id(node_id):
+                        errors.append(ValidationError(
+                            line=i,
+                            column=line.find(node_id) + 1,
+                            message=f"Invalid node ID: '{node_id}'",
+                            suggestion="Node IDs must start with a letter and contain only letters, numbers, and underscores"
+                        ))
+                        if fast_fail:
+                            return errors, warnings
+                
+                # Only "exactly one node" is checked below, so two distinct IDs settle it
+                if len(nodes) < 2:
+                    nodes.update((source, target))
         
         # Warn about isolated nodes
         if len(nodes) == 1:
@@ -228,13 +395,19 @@ class MermaidValidator:
                 line=None,
                 column=None,
                 message="Diagram contains only one node",
-                severity="warning",
+                severity=Severity.WARNING,
                 suggestion="Add connections or more nodes"
             ))
         
         return errors, warnings
     
-    def _validate_sequence(self, code: str) -> Tuple[List[ValidationError], List[ValidationError]]:
+    @staticmethod
+    def _is_valid_node_id(node_id: str) -> bool:
+        """Check NODE_ID_PATTERN with str predicates, skipping the regex engine."""
+        # ASCII identifiers are [A-Za-z_][A-Za-z0-9_]*; node IDs may not start with '_'
+        return node_id.isascii() and node_id.isidentifier() and node_id[0] != '_'
+    
+    def _validate_sequence(self, code: str, fast_fail: bool = False) -> Tuple[List[ValidationError], List[ValidationError]]:
         """Validate sequence diagram-specific syntax."""
         errors = []
         warnings = []
@@ -246,13 +419,13 @@ class MermaidValidator:
                 line=None,
                 column=None,
                 message="No participants declared",
-                severity="warning",
+                severity=Severity.WARNING,
                 suggestion="Consider declaring participants explicitly with 'participant' or 'actor'"
             ))
         
         return errors, warnings
     
-    def _validate_class(self, code: str) -> Tuple[List[ValidationError], List[ValidationError]]:
+    def _validate_class(self, code: str, fast_fail: bool = False) -> Tuple[List[ValidationError], List[ValidationError]]:
         """Validate class diagram-specific syntax."""
         errors = []
         warnings = []
@@ -270,11 +443,9 @@ class MermaidValidator:
     
     def _extract_metadata(self, code: str, diagram_type: DiagramType) -> Dict[str, Any]:
         """Extract metadata about the diagram."""
-        lines = code.split('\n')
-        
         metadata = {
             'type': diagram_type.value,
-            'line_count': len(lines),
+            'line_count': code.count('\n') + 1,
             'char_count': len(code),
             'has_title': 'title' in code.lower(),
             'has_style': 'style' in code or 'classDef' in code,
@@ -282,8 +453,8 @@ class MermaidValidator:
         
         # Count nodes and edges for flowcharts
         if diagram_type == DiagramType.FLOWCHART:
-            node_count = len(re.findall(r'\b\w+\[', code))
-            edge_count = len(re.findall(r'-->|->|==>|-.->|<-->', code))
+            node_count = len(self.NODE_DEF_PATTERN.findall(code))
+            edge_count = len(self.EDGE_COUNT_PATTERN.findall(code))
             metadata.update({
                 'node_count': node_count,
                 'edge_count': edge_count,
@@ -303,12 +474,12 @@ class MermaidValidator:
             Sanitized code safe for rendering
         """
         # Remove potential script injections
-        code = re.sub(r'<script[^>]*>.*?</script>', '', code, flags=re.IGNORECASE | re.DOTALL)
-        code = re.sub(r'javascript:', '', code, flags=re.IGNORECASE)
-        code = re.sub(r'on\w+\s*=', '', code, flags=re.IGNORECASE)
+        code = self.SCRIPT_TAG_PATTERN.sub('', code)
+        code = self.JS_URL_PATTERN.sub('', code)
+        code = self.EVENT_HANDLER_PATTERN.sub('', code)
         
         # Remove HTML tags except those allowed in Mermaid
-        code = re.sub(r'<(?!br\s*/?>)[^>]+>', '', code)
+        code = self.HTML_TAG_PATTERN.sub('', code)
         
         # Escape special characters in strings
         # This is a simplified version - real implementation would be more thorough
@@ -326,7 +497,7 @@ class MermaidValidator:
             Fixed code (best effort)
         """
         # Fix missing diagram declaration
-        if not any(pattern.search(code) for pattern in self.DIAGRAM_PATTERNS.values()):
+        if self._detect_diagram_type(code) is None:
             # Default to flowchart if no type specified
             code = f"graph TD\n{code}"
         
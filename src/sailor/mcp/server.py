@@ -3,6 +3,8 @@ Sailor MCP Server - Clean, production-ready implementation.
 """
 import asyncio
 import json
+from dataclasses import asdict
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import uuid
@@ -111,11 +113,11 @@ class SailorMCPServer:
                 # Store diagram
                 self.diagrams[diagram_id] = {
                     "code": result.code,
-                    "metadata": metadata.dict(),
+                    "metadata": metadata.model_dump(mode="json"),
                     "validation": {
                         "is_valid": validation.is_valid,
-                        "errors": [e.__dict__ for e in validation.errors],
-                        "warnings": [w.__dict__ for w in validation.warnings]
+                        "errors": [{**asdict(e), "severity": e.severity.label} for e in validation.errors],
+                        "warnings": [{**asdict(w), "severity": w.severity.label} for w in validation.warnings]
                     }
                 }
                 
@@ -168,7 +170,7 @@ class SailorMCPServer:
                         "line": e.line,
                         "column": e.column,
                         "message": e.message,
-                        "severity": e.severity,
+                        "severity": e.severity.label,
                         "suggestion": e.suggestion
                     }
                     for e in validation.errors
@@ -178,7 +180,7 @@ class SailorMCPServer:
                         "line": w.line,
                         "column": w.column,
                         "message": w.message,
-                        "severity": w.severity,
+                        "severity": w.severity.label,
                         "suggestion": w.suggestion
                     }
                     for w in validation.warnings
@@ -304,26 +306,32 @@ class SailorMCPServer:
             else:
                 return json.dumps({"error": "Diagram not found"})
         
+        # The template library is fixed at startup, so each listing is serialized once;
+        # bounded because template_type comes straight from the resource URI
+        @lru_cache(maxsize=64)
+        def templates_json(template_type: Optional[str]) -> str:
+            templates = self.generator.get_templates(template_type)
+            if template_type is None:
+                return json.dumps({
+                    "templates": [{**asdict(t), "type": t.type.value} for t in templates],
+                    "count": len(templates)
+                }, indent=2)
+            if templates:
+                return json.dumps({
+                    "type": template_type,
+                    "templates": [{**asdict(t), "type": t.type.value} for t in templates]
+                }, indent=2)
+            return json.dumps({"error": "No templates found for type"})
+        
         @self.mcp.resource("template://list")
         async def list_templates() -> str:
             """List available diagram templates."""
-            templates = self.generator.get_templates()
-            return json.dumps({
-                "templates": [t.dict() for t in templates],
-                "count": len(templates)
-            }, indent=2)
+            return templates_json(None)
         
         @self.mcp.resource("template://{template_type}")
         async def get_template(template_type: str) -> str:
             """Get templates for a specific diagram type."""
-            templates = self.generator.get_templates(template_type)
-            if templates:
-                return json.dumps({
-                    "type": template_type,
-                    "templates": [t.dict() for t in templates]
-                }, indent=2)
-            else:
-                return json.dumps({"error": "No templates found for type"})
+            return templates_json(template_type)
     
     def _register_prompts(self):
         """Register MCP prompts."""
@@ -1,6 +1,8 @@
 """Comprehensive Mermaid.js resources, examples, and templates"""
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, field
+import copy
+from functools import lru_cache
 import json
 
 
@@ -34,6 +36,14 @@ class MermaidResources:
         self.templates = self._load_templates()
         self.syntax_guide = self._load_syntax_guide()
         self.best_practices = self._load_best_practices()
+
+        # The resource tables are never mutated after loading, so lookups are
+        # pure functions of their arguments and can be memoized per instance.
+        # Bounded because the arguments come straight from MCP clients.
+        self._template_lookup = lru_cache(maxsize=128)(self._get_template)
+        self._syntax_help_lookup = lru_cache(maxsize=128)(self._get_syntax_help)
+        # Strings are immutable, so the reference can be shared as is
+        self.generate_quick_reference = lru_cache(maxsize=128)(self._generate_quick_reference)
         
     def _load_examples(self) -> Dict[str, List[MermaidExample]]:
         """Load comprehensive diagram examples"""
@@ -959,7 +969,11 @@ class MermaidResources:
         return results
     
     def get_template(self, template_name: str, category: str = None) -> Optional[MermaidTemplate]:
-        """Get a specific template"""
+        """Get a specific template, as a copy the caller may modify"""
+        return copy.deepcopy(self._template_lookup(template_name, category))
+    
+    def _get_template(self, template_name: str, category: str = None) -> Optional[MermaidTemplate]:
+        """Find a template (memoized behind ``get_template``)"""
         search_categories = [category] if category else list(self.templates.keys())
         
         for cat in search_categories:
@@ -978,7 +992,11 @@ class MermaidResources:
         return result
     
     def get_syntax_help(self, category: str, topic: str = None) -> Dict[str, Any]:
-        """Get syntax help for a specific category and topic"""
+        """Get syntax help for a category and topic, as a copy the caller may modify"""
+        return copy.deepcopy(self._syntax_help_lookup(category, topic))
+    
+    def _get_syntax_help(self, category: str, topic: str = None) -> Dict[str, Any]:
+        """Look up syntax help (memoized behind ``get_syntax_help``)"""
         if category not in self.syntax_guide:
             return {}
         
@@ -992,39 +1010,39 @@ class MermaidResources:
             return self.best_practices[category]
         return self.best_practices.get("general", [])
     
-    def generate_quick_reference(self, category: str) -> str:
-        """Generate a quick reference guide for a diagram type"""
+    def _generate_quick_reference(self, category: str) -> str:
+        """Generate a quick reference guide for a diagram type (memoized as ``generate_quick_reference``)"""
         if category not in self.syntax_guide:
             return f"No reference available for {category}"
         
-        ref = f"# {category.title()} Quick Reference\n\n"
+        parts = [f"# {category.title()} Quick Reference\n\n"]
         
         # Add syntax information
         syntax_info = self.syntax_guide[category]
         for section, content in syntax_info.items():
-            ref += f"## {section.replace('_', ' ').title()}\n"
+            parts.append(f"## {section.replace('_', ' ').title()}\n")
             if isinstance(content, dict):
                 for key, value in content.items():
-                    ref += f"- `{key}`: {value}\n"
+                    parts.append(f"- `{key}`: {value}\n")
             else:
-                ref += f"{content}\n"
-            ref += "\n"
+                parts.append(f"{content}\n")
+            parts.append("\n")
         
         # Add best practices
         practices = self.get_best_practices(category)
         if practices:
-            ref += "## Best Practices\n"
+            parts.append("## Best Practices\n")
             for practice in practices:
-                ref += f"- {practice}\n"
-            ref += "\n"
+                parts.append(f"- {practice}\n")
+            parts.append("\n")
         
         # Add examples
         examples = self.get_examples_by_category(category)
         if examples:
-            ref += "## Examples\n"
+            parts.append("## Examples\n")
             for example in examples[:2]:  # Show first 2 examples
-                ref += f"### {example.name} ({example.complexity})\n"
-                ref += f"{example.description}\n\n"
-                ref += f"```mermaid\n{example.code}\n```\n\n"
+                parts.append(f"### {example.name} ({example.complexity})\n")
+                parts.append(f"{example.description}\n\n")
+                parts.append(f"```mermaid\n{example.code}\n```\n\n")
         
-        return ref
\ No newline at end of file
+        return "".join(parts)
\ No newline at end of file
@@ -359,14 +359,17 @@ Outline your ideas for a comprehensive mindmap."""
         current_content = []
         
         for line in lines:
+            # Strip each line once; the result feeds both the test and the content
+            stripped = line.strip()
             # Check if line starts with a number
-            if line.strip() and line.strip()[0].isdigit() and '.' in line:
+            if stripped and stripped[0].isdigit() and '.' in line:
                 if current_number:
                     numbered_responses[current_number] = '\n'.join(current_content)
-                current_number = line.split('.')[0].strip()
-                current_content = [line.split('.', 1)[1].strip() if '.' in line else '']
+                number, _, rest = line.partition('.')
+                current_number = number.strip()
+                current_content = [rest.strip()]
             elif current_number:
-                current_content.append(line.strip())
+                current_content.append(stripped)
         
         if current_number:
             numbered_responses[current_number] = '\n'.join(current_content)
@@ -1,17 +1,22 @@
 """Mermaid diagram rendering module"""
 import asyncio
 import base64
+import hashlib
 import os
 import tempfile
+from collections import OrderedDict
 from typing import Dict, Optional
 from dataclasses import dataclass
 import logging
 
-from playwright.async_api import async_playwright, Browser, Page
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Warm pages kept open for rendering; each handles one render at a time
+RENDER_WORKERS = int(os.environ.get("SAILOR_RENDER_WORKERS", "2"))
+
 
 @dataclass
 class MermaidConfig:
@@ -25,6 +30,10 @@ class MermaidConfig:
     height: Optional[int] = None
 
 
+class _RenderAbandoned(Exception):
+    """Raised to coalesced waiters when the render they joined was cancelled."""
+
+
 class MermaidRenderer:
     """Renders Mermaid diagrams to images using Playwright"""
     
@@ -32,6 +41,13 @@ class MermaidRenderer:
         self.playwright = None
         self.browser: Optional[Browser] = None
         self._lock = asyncio.Lock()
+        self._context: Optional[BrowserContext] = None
+        # None is a shutdown sentinel that stop() leaves for waiting renders
+        self._page_pool: Optional["asyncio.Queue[Optional[Page]]"] = None
+        # Rendering is deterministic, so identical requests reuse earlier output
+        self._cache: "OrderedDict[bytes, Dict[str, str]]" = OrderedDict()
+        self._max_cache_size = 128
+        self._inflight: Dict[bytes, "asyncio.Future[Dict[str, str]]"] = {}
     
     async def __aenter__(self):
         await self.start()
@@ -49,11 +65,22 @@ class MermaidRenderer:
                     headless=True,
                     args=['--no-sandbox', '--disable-setuid-sandbox']
                 )
-                logger.info("Browser started successfully")
+                # Pages stay warm between renders instead of being created per call
+                self._context = await self.browser.new_context()
+                self._page_pool = asyncio.Queue()
+                for _ in range(max(1, RENDER_WORKERS)):
+                    self._page_pool.put_nowait(await self._context.new_page())
+                logger.info(f"Browser started successfully with {self._page_pool.qsize()} render pages")
     
     async def stop(self):
         """Stop the browser instance"""
         async with self._lock:
+            # Closing the browser also closes the shared context and its pages
+            self._context = None
+            if self._page_pool is not None:
+                # Wake renders still waiting for a page; each passes it on
+                self._page_pool.put_nowait(None)
+                self._page_pool = None
             if self.browser:
                 await self.browser.close()
                 self.browser = None
@@ -89,6 +116,50 @@ class MermaidRenderer:
         if output_format not in ["png", "svg", "both"]:
             raise ValueError(f"Invalid output format: {output_format}. Use 'png', 'svg', or 'both'")
         
+        key = self._cache_key(mermaid_code, config, output_format)
+        while True:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                logger.info(f"Serving cached {output_format} render")
+                return dict(cached)
+            
+            # Concurrent identical requests share the render already in progress
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            logger.info(f"Joining in-flight {output_format} render")
+            try:
+                return dict(await asyncio.shield(inflight))
+            except _RenderAbandoned:
+                continue  # Its caller was cancelled; start or join a fresh render
+        
+        future = asyncio.get_running_loop().create_future()
+        # Mark a failure as retrieved even when nobody else was waiting on it
+        future.add_done_callback(lambda f: f.exception())
+        self._inflight[key] = future
+        try:
+            result = await self._render(mermaid_code, config, output_format)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            self._remember(key, result)
+            future.set_result(result)
+        finally:
+            del self._inflight[key]
+            if not future.done():
+                # Cancelled here; the waiters weren't, so one of them takes over
+                future.set_exception(_RenderAbandoned())
+        return dict(result)
+    
+    async def _render(
+        self,
+        mermaid_code: str,
+        config: MermaidConfig,
+        output_format: str
+    ) -> Dict[str, str]:
+        """Render in the browser, bypassing the result cache"""
         logger.info(f"Rendering {output_format} with theme={config.theme}, look={config.look}")
         
         if not self.browser:
@@ -108,8 +179,14 @@ class MermaidRenderer:
         
         page: Optional[Page] = None
         try:
-            # Create page and render
-            page = await self.browser.new_page()
+            # Take a warm page and render
+            pool = self._page_pool
+            if pool is None:
+                raise RuntimeError("Renderer was stopped")
+            page = await pool.get()
+            if page is None:
+                pool.put_nowait(None)
+                raise RuntimeError("Renderer was stopped while waiting for a render page")
             await page.goto(f'file://{temp_html}')
             await page.wait_for_load_state('networkidle')
             
@@ -118,8 +195,24 @@ class MermaidRenderer:
                                         timeout=5000)
             await page.wait_for_timeout(500)  # Additional time for rendering
             
-            # Get the diagram element
-            diagram = await page.query_selector('#diagram svg, #diagram .mermaid')
+            # Read the diagram's layout box, and its markup if SVG is wanted,
+            # in a single round trip
+            diagram = await page.evaluate(
+                """(wantSvg) => {
+                    const el = document.querySelector('#diagram svg, #diagram .mermaid');
+                    if (!el) return null;
+                    const rect = el.getBoundingClientRect();
+                    const svg = document.querySelector('#diagram svg');
+                    return {
+                        x: rect.x + window.scrollX,
+                        y: rect.y + window.scrollY,
+                        width: rect.width,
+                        height: rect.height,
+                        svg: wantSvg && svg ? svg.outerHTML : ''
+                    };
+                }""",
+                output_format in ["svg", "both"]
+            )
             if not diagram:
                 raise RuntimeError("Failed to render diagram - no SVG element found")
             
@@ -127,36 +220,40 @@ class MermaidRenderer:
             
             # Export as PNG
             if output_format in ["png", "both"]:
+                # One page-level capture clipped to the diagram; element
+                # screenshots add protocol round-trips and can hang under load.
+                if not diagram['width'] or not diagram['height']:
+                    raise RuntimeError("Failed to render diagram - SVG element has no layout box")
+                
                 png_options = {
                     'type': 'png',
-                    'omit_background': (config.background == "transparent")
+                    'omit_background': (config.background == "transparent"),
+                    # Clip against the whole page so large diagrams aren't cut at the viewport
+                    'full_page': True,
+                    'clip': {
+                        'x': diagram['x'],
+                        'y': diagram['y'],
+                        'width': diagram['width'],
+                        'height': diagram['height']
+                    }
                 }
                 
                 # Only add scale if it's 'css' or 'device'
                 if hasattr(config, 'scale_type'):
                     png_options['scale'] = config.scale_type
-                else:
-                    # Use default screenshot without scale parameter
-                    pass
                 
                 # Add dimensions if specified
                 if config.width:
-                    png_options['clip'] = {
-                        'x': 0,
-                        'y': 0,
-                        'width': config.width,
-                        'height': config.height or config.width
-                    }
+                    png_options['clip']['width'] = config.width
+                    png_options['clip']['height'] = config.height or config.width
                 
-                png_buffer = await diagram.screenshot(**png_options)
+                png_buffer = await page.screenshot(**png_options)
                 result['png'] = base64.b64encode(png_buffer).decode('utf-8')
                 logger.info(f"PNG rendered successfully ({len(png_buffer)} bytes)")
             
             # Export as SVG
             if output_format in ["svg", "both"]:
-                svg_content = await page.evaluate(
-                    '() => document.querySelector("#diagram svg")?.outerHTML || ""'
-                )
+                svg_content = diagram['svg']
                 if svg_content:
                     result['svg'] = base64.b64encode(
                         svg_content.encode('utf-8')
@@ -176,12 +273,45 @@ class MermaidRenderer:
         finally:
             # Clean up
             if page:
-                await page.close()
+                await self._return_page(page)
             try:
                 os.unlink(temp_html)
             except Exception:
                 pass
     
+    async def _return_page(self, page: Page):
+        """Reset a page and hand it back to the pool, replacing it if it broke"""
+        pool = self._page_pool
+        if pool is None:
+            return  # Renderer was stopped while this render ran
+        try:
+            await page.goto('about:blank')
+        except Exception:
+            try:
+                await page.close()
+            except Exception:
+                pass  # Already gone with its browser
+            # stop() may have run during the awaits above
+            if self._context is None or self._page_pool is not pool:
+                return
+            page = await self._context.new_page()
+        if self._page_pool is pool:
+            pool.put_nowait(page)
+    
+    @staticmethod
+    def _cache_key(mermaid_code: str, config: MermaidConfig, output_format: str) -> bytes:
+        """Content-address a render by its code, configuration and format"""
+        payload = f"{mermaid_code}\x00{config!r}\x00{output_format}"
+        return hashlib.sha256(payload.encode('utf-8')).digest()
+    
+    def _remember(self, key: bytes, result: Dict[str, str]):
+        """Store a render result, evicting the least recently used beyond the limit"""
+        if not result:
+            return
+        self._cache[key] = dict(result)
+        if len(self._cache) > self._max_cache_size:
+            self._cache.popitem(last=False)
+    
     def _create_html(self, mermaid_code: str, config: MermaidConfig) -> str:
         """Create HTML page with Mermaid diagram"""
         return f"""<!DOCTYPE html>
@@ -16,6 +16,7 @@ import threading
 from collections import defaultdict
 from typing import List, Dict, Any, Optional, Union
 from dataclasses import dataclass, field
+from functools import lru_cache
 import json
 
 from fastmcp import FastMCP
@@ -41,6 +42,9 @@ RATE_LIMIT_REQUESTS = int(os.environ.get("RATE_LIMIT_REQUESTS", "100"))  # reque
 RATE_LIMIT_WINDOW = int(os.environ.get("RATE_LIMIT_WINDOW", "60"))  # window in seconds
 RATE_LIMIT_RENDER = int(os.environ.get("RATE_LIMIT_RENDER", "20"))  # render requests per window (more expensive)
 
+# Batch rendering configuration
+RENDER_CONCURRENCY = int(os.environ.get("SAILOR_RENDER_CONCURRENCY", "4"))  # concurrent renders per process
+
 # Create FastMCP server instance
 mcp = FastMCP("sailor-mermaid", version="2.0.0")
 
@@ -263,6 +267,7 @@ metrics = {
 # Global resources
 resources = MermaidResources()
 renderer = None
+_render_semaphore: Optional[asyncio.Semaphore] = None
 
 
 # ==================== HELPER FUNCTIONS ====================
@@ -288,10 +293,39 @@ def create_annotated_image(image_data: bytes, format: str) -> ImageContent:
     return img.to_image_content(annotations=annotations)
 
 
-def _get_example_code() -> Dict[str, str]:
-    """Get example Mermaid code for different diagram types"""
+@lru_cache(maxsize=1024)
+def _validate_cached(code: str) -> Dict[str, Any]:
+    """Validate once per distinct diagram; tools in one turn often share the same code"""
+    return MermaidValidator.validate(code)
+
+
+def validate_code(code: str) -> Dict[str, Any]:
+    """Validate Mermaid code, reusing earlier results for identical code"""
+    validation = _validate_cached(code)
+    # Hand out fresh lists so callers can't corrupt the cached result
     return {
-        "flowchart": """graph TD
+        **validation,
+        "errors": list(validation["errors"]),
+        "warnings": list(validation["warnings"]),
+    }
+
+
+async def validate_code_async(code: str) -> Dict[str, Any]:
+    """Validate in a worker thread so regex work doesn't stall concurrent tool calls"""
+    return await asyncio.to_thread(validate_code, code)
+
+
+def _get_render_semaphore() -> asyncio.Semaphore:
+    """Get the process-wide limit on concurrent batch renders (created on first use)"""
+    global _render_semaphore
+    if _render_semaphore is None:
+        _render_semaphore = asyncio.Semaphore(RENDER_CONCURRENCY)
+    return _render_semaphore
+
+
+# Example Mermaid code for different diagram types, built once at import
+_EXAMPLE_CODE: Dict[str, str] = {
+    "flowchart": """graph TD
     A[Start] --> B{Is it working?}
     B -->|Yes| C[Great!]
     B -->|No| D[Debug]
@@ -299,7 +333,7 @@ def _get_example_code() -> Dict[str, str]:
     E --> B
     C --> F[Deploy]""",
 
-        "sequence": """sequenceDiagram
+    "sequence": """sequenceDiagram
     participant User
     participant Frontend
     participant Backend
@@ -312,7 +346,7 @@ def _get_example_code() -> Dict[str, str]:
     Backend-->>Frontend: 200 OK
     Frontend-->>User: Show success""",
 
-        "gantt": """gantt
+    "gantt": """gantt
     title Project Schedule
     dateFormat YYYY-MM-DD
     section Planning
@@ -325,7 +359,7 @@ def _get_example_code() -> Dict[str, str]:
     Unit tests :test1, 2024-02-15, 10d
     Integration :test2, after test1, 7d""",
 
-        "class": """classDiagram
+    "class": """classDiagram
     class User {
         -String id
         -String email
@@ -345,7 +379,7 @@ def _get_example_code() -> Dict[str, str]:
     User <|-- Admin
     User <|-- Customer""",
 
-        "state": """stateDiagram-v2
+    "state": """stateDiagram-v2
     [*] --> Idle
     Idle --> Processing : Start
     Processing --> Success : Complete
@@ -354,7 +388,7 @@ def _get_example_code() -> Dict[str, str]:
     Error --> Idle : Retry
     Error --> [*] : Give up""",
 
-        "er": """erDiagram
+    "er": """erDiagram
     CUSTOMER ||--o{ ORDER : places
     ORDER ||--|{ LINE-ITEM : contains
     CUSTOMER {
@@ -375,13 +409,13 @@ def _get_example_code() -> Dict[str, str]:
         string productId FK
     }""",
 
-        "pie": """pie title Browser Usage Stats
+    "pie": """pie title Browser Usage Stats
     "Chrome" : 65
     "Firefox" : 20
     "Safari" : 10
     "Edge" : 5""",
 
-        "mindmap": """mindmap
+    "mindmap": """mindmap
   root((Sailor Site))
     Features
       AI Generation
@@ -401,7 +435,7 @@ def _get_example_code() -> Dict[str, str]:
       Documentation
       Architecture
       Planning"""
-    }
+}
 
 
 # ==================== TOOLS ====================
@@ -518,23 +552,23 @@ async def request_mermaid_generation(
     requirements = requirements or []
     style = style or {}
 
-    # Build the request for the calling LLM
-    prompt = f"""Please generate Mermaid diagram code for the following request:
+    # Build the request for the calling LLM as a list of chunks joined once
+    parts = [f"""Please generate Mermaid diagram code for the following request:
 
 Description: {description}
 Diagram Type: {diagram_type}
-"""
+"""]
 
     if requirements:
-        prompt += f"\nSpecific Requirements:\n" + "\n".join(f"- {req}" for req in requirements)
+        parts.append("\nSpecific Requirements:\n")
+        parts.append("\n".join(f"- {req}" for req in requirements))
 
     if style:
-        prompt += f"\n\nStyle Preferences:\n"
-        for key, value in style.items():
-            prompt += f"- {key}: {value}\n"
+        parts.append("\n\nStyle Preferences:\n")
+        parts.extend(f"- {key}: {value}\n" for key, value in style.items())
 
     # Add guidelines
-    prompt += f"""
+    parts.append(f"""
 
 Guidelines for {diagram_type} diagrams:
 - Use clear, descriptive labels
@@ -543,14 +577,13 @@ Guidelines for {diagram_type} diagrams:
 - For flowcharts/graphs, specify direction (TD, LR, etc.)
 - Keep the diagram well-organized and readable
 
-Please respond with ONLY the Mermaid code, no explanations or markdown blocks."""
+Please respond with ONLY the Mermaid code, no explanations or markdown blocks.""")
 
     # Add example
-    examples = _get_example_code()
-    if diagram_type in examples:
-        prompt += f"\n\nExample {diagram_type}:\n{examples[diagram_type]}"
+    if diagram_type in _EXAMPLE_CODE:
+        parts.append(f"\n\nExample {diagram_type}:\n{_EXAMPLE_CODE[diagram_type]}")
 
-    return prompt
+    return "".join(parts)
 
 
 # Tool: Validate and Render Mermaid
@@ -603,7 +636,7 @@ async def validate_and_render_mermaid(
 
     # Remove markdown code blocks if present
     if code.startswith('```'):
-        lines = code.split('\n')
+        lines = code.splitlines()
         if lines[0].startswith('```'):
             lines = lines[1:]
         if lines and lines[-1] == '```':
@@ -611,12 +644,14 @@ async def validate_and_render_mermaid(
         code = '\n'.join(lines)
 
     # Validate the code
-    validation = MermaidValidator.validate(code)
+    validation = await validate_code_async(code)
 
     if not validation['valid'] and fix_errors:
-        # Attempt to fix common issues
-        code = MermaidValidator.fix_common_errors(code)
-        validation = MermaidValidator.validate(code)
+        # Attempt to fix common issues; unchanged code would fail validation again
+        fixed_code = MermaidValidator.fix_common_errors(code)
+        if fixed_code != code:
+            code = fixed_code
+            validation = await validate_code_async(code)
 
     if not validation['valid']:
         error_msg = "## Mermaid Code Validation Failed\n\n"
@@ -736,6 +771,83 @@ async def validate_and_render_mermaid(
         }
 
 
+# Tool: Render Diagrams Batch
+@mcp.tool(description="Validate and render several Mermaid diagrams concurrently. Each item is {code, style?, format?}; returns per-diagram file_ids for retrieval via get_diagram(), or that diagram's errors.")
+async def render_diagrams_batch(
+    diagrams: List[Dict[str, Any]],
+    client_id: str = "default"
+) -> Dict[str, Any]:
+    """Render many diagrams at once, bounded by SAILOR_RENDER_CONCURRENCY.
+
+    Args:
+        diagrams: Items with 'code' and optional 'style' (theme, look, background) and 'format' (png, svg)
+        client_id: Client identifier for rate limiting (each diagram counts as one render)
+
+    Returns:
+        Dict with one result per input diagram, in input order
+    """
+    global renderer
+    import base64
+
+    metrics["total_requests"] += 1
+
+    codes = [(item.get('code') or '').strip() for item in diagrams]
+    # Duplicate diagrams in a batch are validated once thanks to the validation cache
+    validations = await asyncio.gather(*(validate_code_async(code) for code in codes))
+
+    if any(validation['valid'] for validation in validations) and not renderer:
+        logger.info("Initializing renderer on first use...")
+        renderer = await get_renderer()
+
+    async def render_one(item: Dict[str, Any], code: str, validation: Dict[str, Any]) -> Dict[str, Any]:
+        if not validation['valid']:
+            return {"valid": False, "errors": validation['errors']}
+
+        allowed, message = rate_limiter.check_rate_limit(client_id, is_render=True)
+        if not allowed:
+            metrics["rate_limited"] += 1
+            return {"error": message, "rate_limited": True, "retry_after_seconds": RATE_LIMIT_WINDOW}
+
+        style = item.get('style') or {}
+        config = MermaidConfig(
+            theme=style.get('theme', 'default'),
+            look=style.get('look', 'classic'),
+            background=style.get('background', 'transparent')
+        )
+        try:
+            async with _get_render_semaphore():
+                images = await renderer.render(code, config, item.get('format', 'png'))
+        except Exception as e:
+            metrics["failed_renders"] += 1
+            logger.error(f"Batch rendering error: {e}")
+            return {"valid": True, "rendering_failed": True, "error": f"Rendering failed: {str(e)}"}
+
+        metrics["successful_renders"] += 1
+        file_ids = {
+            img_format: temp_file_store.store(base64.b64decode(img_data), img_format)
+            for img_format, img_data in images.items()
+        }
+        result = {
+            "valid": True,
+            "diagram_type": validation['diagram_type'],
+            "file_ids": file_ids
+        }
+        if validation['warnings']:
+            result["warnings"] = validation['warnings']
+        return result
+
+    results = await asyncio.gather(*(
+        render_one(item, code, validation)
+        for item, code, validation in zip(diagrams, codes, validations)
+    ))
+
+    return {
+        "count": len(results),
+        "results": list(results),
+        "retrieval_note": "Use get_diagram(file_id) to retrieve image data. Files expire after 30 minutes or first retrieval."
+    }
+
+
 # Tool: Get Mermaid Examples
 @mcp.tool(description="Get examples of different Mermaid diagram types")
 async def get_mermaid_examples(
@@ -879,7 +991,7 @@ async def analyze_diagram_code(
     focus_areas = focus_areas or ['syntax', 'best_practices']
 
     # Validate syntax first
-    validation = MermaidValidator.validate(code)
+    validation = await validate_code_async(code)
 
     result = {
         "is_valid": validation.get('valid', False),
@@ -900,14 +1012,15 @@ async def analyze_diagram_code(
 
     if 'readability' in focus_areas:
         readability_issues = []
-        lines = code.split('\n')
-        if len(lines) > 50:
+        # Reuse the validator's line count; only line lengths need the split lines
+        if result["line_count"] > 50:
             readability_issues.append("Consider breaking complex diagram into smaller sub-diagrams")
-        if any(len(line) > 100 for line in lines):
+        if max(map(len, code.splitlines()), default=0) > 100:
             readability_issues.append("Some lines are very long - consider shorter labels")
         if code.count('-->') > 20:
             readability_issues.append("Many connections detected - ensure clear visual hierarchy")
-        if not any(word in code.lower() for word in ['title', 'subgraph', 'section']):
+        lowered = code.lower()
+        if not any(word in lowered for word in ('title', 'subgraph', 'section')):
             readability_issues.append("Consider adding title or grouping elements for clarity")
         result["analysis"]["readability"] = readability_issues
 
@@ -936,7 +1049,7 @@ async def suggest_diagram_improvements(
     improvement_goals = improvement_goals or ['clarity']
 
     # First analyze the current code
-    validation = MermaidValidator.validate(current_code)
+    validation = await validate_code_async(current_code)
     diagram_type = validation['diagram_type']
 
     result = {
@@ -1,12 +1,19 @@
 """Mermaid code validation module"""
-from typing import Dict, Any, List
+from typing import Any, Callable, ClassVar, Dict, List, Optional
 import re
 
+# Compiled once; validate() runs on every analyze/suggest/render tool call
+_NODE_RE = re.compile(r'([A-Za-z0-9_]+)[\[\{\(]')
+
+# Tokens whose presence marks class relationships / sequence messages
+_CLASS_RELATIONSHIPS = ('<|--', '--|>', '*--', '--*', 'o--', '--o')
+_SEQUENCE_MESSAGES = ('->>', '-->>', '-)')
+
 
 class MermaidValidator:
     """Validates Mermaid diagram syntax and structure"""
     
-    DIAGRAM_TYPES = {
+    DIAGRAM_TYPES: ClassVar[Dict[str, List[str]]] = {
         'graph': ['TD', 'TB', 'BT', 'LR', 'RL'],
         'flowchart': ['TD', 'TB', 'BT', 'LR', 'RL'],
         'sequenceDiagram': [],
@@ -28,6 +35,9 @@ class MermaidValidator:
         'architecture-beta': []
     }
     
+    # Longest names first so prefix matching prefers e.g. stateDiagram-v2 over stateDiagram
+    _TYPES_BY_LENGTH: ClassVar[List[str]] = sorted(DIAGRAM_TYPES, key=len, reverse=True)
+    
     @staticmethod
     def validate(code: str) -> Dict[str, Any]:
         """
@@ -44,41 +54,45 @@ class MermaidValidator:
             - diagram_type: Detected diagram type
             - line_count: Number of lines in the code
         """
-        errors = []
-        warnings = []
+        errors: List[str] = []
+        warnings: List[str] = []
         
         # Basic validation
         if not code or not code.strip():
             errors.append("Empty diagram code")
             return {"valid": False, "errors": errors, "warnings": warnings}
         
-        lines = code.strip().split('\n')
-        first_line = lines[0].strip()
-        
-        # Check diagram type
-        valid_start = False
-        diagram_type = "unknown"
-        
-        # Check for longer type names first to avoid false matches
-        sorted_types = sorted(MermaidValidator.DIAGRAM_TYPES.items(), 
-                            key=lambda x: len(x[0]), reverse=True)
-        
-        for dtype, directions in sorted_types:
-            if first_line.startswith(dtype):
-                valid_start = True
-                diagram_type = dtype
-                
-                # Check direction for graph/flowchart
-                if directions and dtype in ['graph', 'flowchart']:
-                    has_valid_direction = any(
-                        first_line.startswith(f"{dtype} {d}") for d in directions
+        # Only the header line matters for the type; count lines without splitting them all
+        stripped = code.strip()
+        newline = stripped.find('\n')
+        first_line = (stripped if newline < 0 else stripped[:newline]).strip()
+        line_count = stripped.count('\n') + 1
+        
+        # Check diagram type: exact header token first, then prefix match (e.g. flowchart-elk)
+        header = first_line.split(maxsplit=1)[0]
+        dtype: Optional[str]
+        if header in MermaidValidator.DIAGRAM_TYPES:
+            dtype = header
+        else:
+            dtype = next(
+                (t for t in MermaidValidator._TYPES_BY_LENGTH if first_line.startswith(t)),
+                None
+            )
+        valid_start = dtype is not None
+        diagram_type = dtype or "unknown"
+        
+        if dtype is not None:
+            directions = MermaidValidator.DIAGRAM_TYPES[dtype]
+            # Check direction for graph/flowchart
+            if directions and dtype in ['graph', 'flowchart']:
+                has_valid_direction = any(
+                    first_line.startswith(f"{dtype} {d}") for d in directions
+                )
+                if not has_valid_direction:
+                    warnings.append(
+                        f"Missing or invalid direction for {dtype}. "
+                        f"Use one of: {', '.join(directions)}"
                     )
-                    if not has_valid_direction:
-                        warnings.append(
-                            f"Missing or invalid direction for {dtype}. "
-                            f"Use one of: {', '.join(directions)}"
-                        )
-                break
         
         if not valid_start:
             errors.append(
@@ -107,20 +121,15 @@ class MermaidValidator:
             errors.append("Unclosed string literal (odd number of quotes)")
         
         # Diagram-specific validation
-        if diagram_type == 'graph' or diagram_type == 'flowchart':
-            MermaidValidator._validate_flowchart(code, warnings)
-        elif diagram_type == 'sequenceDiagram':
-            MermaidValidator._validate_sequence(code, warnings)
-        elif diagram_type == 'gantt':
-            MermaidValidator._validate_gantt(code, warnings)
-        elif diagram_type == 'classDiagram':
-            MermaidValidator._validate_class(code, warnings)
+        type_validator = _TYPE_VALIDATORS.get(diagram_type)
+        if type_validator is not None:
+            type_validator(code, warnings)
         
         return {
             "valid": len(errors) == 0,
             "errors": errors,
             "warnings": warnings,
-            "line_count": len(lines),
+            "line_count": line_count,
             "diagram_type": diagram_type
         }
     
@@ -132,13 +141,12 @@ class MermaidValidator:
             warnings.append("Empty node labels detected")
         
         # Check for connections
-        if '-->' not in code and '---' not in code and '-.->':
+        if '-->' not in code and '---' not in code and '-.->' not in code:
             warnings.append("No connections found in flowchart")
         
-        # Check for node definitions
-        node_pattern = r'([A-Za-z0-9_]+)[\[\{\(]'
-        nodes = re.findall(node_pattern, code)
-        if not nodes:
+        # Check for node definitions; without a bracket there is nothing to match
+        has_brackets = '[' in code or '(' in code or '{' in code
+        if not has_brackets or not _NODE_RE.search(code):
             warnings.append("No node definitions found")
     
     @staticmethod
@@ -147,7 +155,7 @@ class MermaidValidator:
         if 'participant' not in code:
             warnings.append("No participants defined in sequence diagram")
         
-        if '->>' not in code and '-->>' not in code and '-)' not in code:
+        if not any(token in code for token in _SEQUENCE_MESSAGES):
             warnings.append("No messages found in sequence diagram")
     
     @staticmethod
@@ -170,9 +178,7 @@ class MermaidValidator:
             warnings.append("No class definitions found")
         
         # Check for relationships
-        relationship_patterns = ['<|--', '--|>', '*--', '--*', 'o--', '--o']
-        has_relationship = any(pattern in code for pattern in relationship_patterns)
-        if not has_relationship:
+        if not any(token in code for token in _CLASS_RELATIONSHIPS):
             warnings.append("No class relationships defined")
     
     @staticmethod
@@ -188,9 +194,9 @@ class MermaidValidator:
         """
         fixed_code = code
         
-        # Fix missing direction for graph
+        # Fix missing direction for graph; only the first line is inspected
         if fixed_code.startswith('graph') and not any(
-            d in fixed_code.split('\n')[0] for d in ['TD', 'TB', 'BT', 'LR', 'RL']
+            d in fixed_code.partition('\n')[0] for d in ['TD', 'TB', 'BT', 'LR', 'RL']
         ):
             fixed_code = fixed_code.replace('graph', 'graph TD', 1)
         
@@ -202,9 +208,22 @@ class MermaidValidator:
             'erdiagram': 'erDiagram',
         }
         
+        # Only the header can carry a typo, so lowercase it once and stop at the first match
+        header = fixed_code[:max(map(len, replacements))].lower()
         for typo, correct in replacements.items():
-            if fixed_code.lower().startswith(typo):
+            if header.startswith(typo):
                 fixed_code = fixed_code.replace(typo, correct, 1)
                 fixed_code = fixed_code.replace(typo.capitalize(), correct, 1)
+                break
         
-        return fixed_code
\ No newline at end of file
+        return fixed_code
+
+
+# Diagram-specific validators by type, resolved with one dict lookup per call
+_TYPE_VALIDATORS: Dict[str, Callable[[str, List[str]], None]] = {
+    'graph': MermaidValidator._validate_flowchart,
+    'flowchart': MermaidValidator._validate_flowchart,
+    'sequenceDiagram': MermaidValidator._validate_sequence,
+    'gantt': MermaidValidator._validate_gantt,
+    'classDiagram': MermaidValidator._validate_class,
+}
@@ -2,10 +2,28 @@
 import pytest
 import sys
 import os
+import importlib.util
 
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+
+def load_source_module(relative_path):
+    """Load a standalone module from src/ by file path.
+
+    src/sailor/__init__.py imports core.parser, which is not in this tree,
+    so modules without package-relative imports are loaded directly.
+    """
+    name = "_src_" + relative_path.replace("/", "_")[:-len(".py")]
+    if name not in sys.modules:
+        path = os.path.join(os.path.dirname(__file__), '..', 'src', relative_path)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        # Registered before executing so dataclasses can resolve the module
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
 # Check if Playwright is available
 try:
     from playwright.async_api import async_playwright
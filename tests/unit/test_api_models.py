@@ -0,0 +1,40 @@
+"""Unit tests for the web API request models"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from tests.conftest import load_source_module
+
+models = load_source_module("sailor/api/models.py")
+
+
+class TestBatchValidateRequest:
+    """Test cases for BatchValidateRequest"""
+
+    @pytest.fixture
+    def client(self):
+        # The real app needs sailor.core, so mount the model on a bare route
+        app = FastAPI()
+
+        @app.post("/batch")
+        def batch(request: models.BatchValidateRequest):
+            return {"count": len(request.codes)}
+
+        return TestClient(app)
+
+    def test_accepts_full_batch(self, client):
+        """Test that a batch at the limit is accepted"""
+        response = client.post("/batch", json={"codes": ["graph TD\n    A --> B"] * 100})
+        assert response.status_code == 200
+        assert response.json() == {"count": 100}
+
+    def test_oversized_batch_rejected_with_422(self, client):
+        """Test that a batch over the limit never reaches the handler"""
+        response = client.post("/batch", json={"codes": ["graph TD\n    A --> B"] * 101})
+        assert response.status_code == 422
+
+    def test_model_rejects_oversized_batch(self):
+        """Test the limit on the model itself"""
+        with pytest.raises(ValidationError):
+            models.BatchValidateRequest(codes=["pie"] * 101)
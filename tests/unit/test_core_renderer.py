@@ -0,0 +1,407 @@
+"""Unit tests for the core renderer's caching - no browser needed"""
+import asyncio
+import base64
+import functools
+import os
+
+import pytest
+
+from tests.conftest import load_source_module
+
+try:
+    renderer_module = load_source_module("sailor/core/renderer.py")
+except (ImportError, OSError) as e:  # cairosvg also needs the native cairo library
+    pytest.skip(f"core renderer dependencies unavailable: {e}", allow_module_level=True)
+DiskCache = renderer_module.DiskCache
+MermaidRenderer = renderer_module.MermaidRenderer
+OutputFormat = renderer_module.OutputFormat
+RenderResult = renderer_module.RenderResult
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nnot really a png"
+
+
+def png_result():
+    return RenderResult(
+        success=True,
+        format=OutputFormat.PNG,
+        data=base64.b64encode(PNG_BYTES).decode('ascii'),
+        metadata={"width": 10, "height": 20, "scale": 2.0}
+    )
+
+
+def svg_result(svg="<svg>é</svg>"):
+    return RenderResult(
+        success=True,
+        format=OutputFormat.SVG,
+        data=svg,
+        metadata={"raw_size": len(svg), "encoding": "utf-8"}
+    )
+
+
+class TestDiskCache:
+    """Test cases for DiskCache"""
+
+    def test_miss_returns_none(self, tmp_path):
+        """Test that an unknown key is a miss"""
+        cache = DiskCache(tmp_path)
+        assert cache.get(b"\x00" * 32, OutputFormat.PNG) is None
+
+    def test_base64_round_trip(self, tmp_path):
+        """Test that binary output is stored raw and comes back as base64"""
+        cache = DiskCache(tmp_path)
+        key = b"\x01" * 32
+        cache.put(key, png_result())
+
+        assert (tmp_path / f"{key.hex()}.png").read_bytes() == PNG_BYTES
+        loaded = cache.get(key, OutputFormat.PNG)
+        assert loaded.success
+        assert loaded.data == png_result().data
+        assert loaded.to_bytes() == PNG_BYTES
+        assert loaded.metadata == {"width": 10, "height": 20, "scale": 2.0}
+
+    def test_utf8_round_trip(self, tmp_path):
+        """Test that SVG text is stored as utf-8 and comes back as text"""
+        cache = DiskCache(tmp_path)
+        key = b"\x02" * 32
+        cache.put(key, svg_result())
+
+        assert (tmp_path / f"{key.hex()}.svg").read_text(encoding='utf-8') == "<svg>é</svg>"
+        loaded = cache.get(key, OutputFormat.SVG)
+        assert loaded.data == "<svg>é</svg>"
+        assert loaded.metadata["encoding"] == "utf-8"
+
+    def test_format_is_part_of_the_entry(self, tmp_path):
+        """Test that an entry is only found under its own format"""
+        cache = DiskCache(tmp_path)
+        key = b"\x03" * 32
+        cache.put(key, png_result())
+        assert cache.get(key, OutputFormat.SVG) is None
+
+    def test_failed_render_not_stored(self, tmp_path):
+        """Test that failed or empty renders never reach the disk"""
+        cache = DiskCache(tmp_path)
+        cache.put(b"\x04" * 32, RenderResult(success=False, format=OutputFormat.PNG, error="boom"))
+        cache.put(b"\x05" * 32, RenderResult(success=True, format=OutputFormat.PNG))
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_oldest_entries_pruned(self, tmp_path):
+        """Test that entries beyond max_entries are removed oldest first"""
+        cache = DiskCache(tmp_path, max_entries=2)
+        keys = [bytes([i]) * 32 for i in range(3)]
+        for age, key in enumerate(keys):
+            cache.put(key, png_result())
+            path = tmp_path / f"{key.hex()}.png"
+            os.utime(path, (age, age))
+        cache.put(b"\x09" * 32, png_result())
+
+        assert cache.get(keys[0], OutputFormat.PNG) is None
+        assert cache.get(keys[1], OutputFormat.PNG) is None
+        assert cache.get(keys[2], OutputFormat.PNG) is not None
+        assert len(list(tmp_path.iterdir())) == 4  # two outputs plus sidecars
+
+    def test_clear(self, tmp_path):
+        """Test that clear removes every entry"""
+        cache = DiskCache(tmp_path)
+        cache.put(b"\x06" * 32, png_result())
+        cache.put(b"\x07" * 32, svg_result())
+        cache.clear()
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_opt_in_through_environment(self, tmp_path, monkeypatch):
+        """Test that the cache only exists when SAILOR_CACHE_DIR is set"""
+        monkeypatch.delenv("SAILOR_CACHE_DIR", raising=False)
+        assert DiskCache.from_env() is None
+        assert MermaidRenderer()._disk_cache is None
+
+        monkeypatch.setenv("SAILOR_CACHE_DIR", str(tmp_path))
+        assert DiskCache.from_env().directory == tmp_path
+
+
+class TestEventLoopBinding:
+    """Test cases for constructing the renderer outside an event loop"""
+
+    def test_no_loop_primitives_at_construction(self):
+        """Test that construction, as at import time, creates no asyncio primitives"""
+        renderer = MermaidRenderer()
+        assert renderer._browser_lock is None
+        assert renderer._page_pool is None
+
+    def test_renderer_built_before_loop_usable_in_it(self):
+        """Test that a renderer created with no loop running works in a later loop"""
+        renderer = MermaidRenderer()
+
+        async def use():
+            # Hold the lock so close() has to wait on it inside this loop
+            renderer._init_loop_primitives()
+            async with renderer._browser_lock:
+                closing = asyncio.ensure_future(renderer.close())
+                await asyncio.sleep(0)
+                assert not closing.done()
+            await closing
+
+        asyncio.run(use())
+        assert renderer._browser_lock is not None
+
+
+class TestBrowserProfile:
+    """Test cases for the Chromium profile location"""
+
+    def test_profile_under_user_cache_dir(self, tmp_path, monkeypatch):
+        """Test that the cache home comes from XDG_CACHE_HOME rather than shared /tmp"""
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        assert renderer_module._user_cache_dir() == tmp_path / "sailor"
+
+    @pytest.mark.parametrize("opt_out, sandboxed", [(None, True), ("0", True), ("1", False)])
+    async def test_sandbox_on_unless_opted_out(self, tmp_path, monkeypatch, opt_out, sandboxed):
+        """Test that Chromium keeps its sandbox unless SAILOR_CHROMIUM_NO_SANDBOX=1"""
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        if opt_out is None:
+            monkeypatch.delenv("SAILOR_CHROMIUM_NO_SANDBOX", raising=False)
+        else:
+            monkeypatch.setenv("SAILOR_CHROMIUM_NO_SANDBOX", opt_out)
+        launches = []
+
+        class Chromium:
+            async def launch_persistent_context(self, user_data_dir, **options):
+                launches.append(options["args"])
+
+        renderer = MermaidRenderer()
+        renderer._playwright = type("Playwright", (), {"chromium": Chromium()})()
+        await renderer._launch_context()
+
+        [args] = launches
+        assert ("--no-sandbox" not in args) is sandboxed
+        assert ("--no-zygote" not in args) is sandboxed
+
+    async def test_close_removes_fallback_profile(self, tmp_path):
+        """Test that a private fallback profile is deleted when the browser closes"""
+        profile = tmp_path / "sailor-mermaid-profile-x"
+        (profile / "Default").mkdir(parents=True)
+        renderer = MermaidRenderer()
+        renderer._temp_profile = str(profile)
+
+        await renderer.close()
+
+        assert not profile.exists()
+        assert renderer._temp_profile is None
+
+
+class StalePage:
+    """Page whose browser was shut down while a render held it"""
+
+    def __init__(self):
+        self.context = object()
+        self.closed = False
+
+    async def goto(self, url):
+        raise RuntimeError("Target page, context or browser has been closed")
+
+    async def close(self):
+        self.closed = True
+
+
+class TestBrowserLifecycle:
+    """Test cases for closing the browser under running renders"""
+
+    async def test_return_page_after_close(self):
+        """Test that a page returned after close() releases its render slot"""
+        renderer = MermaidRenderer()
+        renderer._init_loop_primitives()
+        renderer._pages_out = 1
+        page = StalePage()
+
+        await renderer._return_page(page)
+
+        assert page.closed
+        assert renderer._pages_out == 0
+        assert renderer._page_pool.empty()
+        assert renderer._idle_timer is None  # No browser left to shut down
+
+    async def test_idle_close_task_kept_and_failure_logged(self, caplog):
+        """Test that the idle shutdown runs in a held task whose failure is logged"""
+        renderer = MermaidRenderer()
+        renderer.IDLE_SECS = 0
+        renderer._context = object()
+        renderer._pages_out = 1
+
+        async def close():
+            assert renderer._idle_task is not None
+            raise RuntimeError("browser already gone")
+
+        renderer.close = close
+        renderer._release_page()
+        assert renderer._idle_timer is not None
+        while renderer._idle_timer is not None or renderer._idle_task is not None:
+            await asyncio.sleep(0)
+
+        assert "Idle browser shutdown failed" in caplog.text
+
+    async def test_close_cancels_pending_idle_timer(self):
+        """Test that an explicit close() cancels the idle countdown"""
+        renderer = MermaidRenderer()
+        renderer._pages_out = 1
+        renderer._context = object()
+        renderer._release_page()
+        timer = renderer._idle_timer
+        renderer._context = None  # Nothing real to shut down
+
+        await renderer.close()
+
+        assert timer.cancelled()
+        assert renderer._idle_timer is None
+
+    async def test_context_manager_keeps_shared_instance_open(self, monkeypatch):
+        """Test that leaving async with only closes privately constructed renderers"""
+        closed = []
+        shared = renderer_module.get_renderer()
+        private = MermaidRenderer()
+
+        async def ensure_browser():
+            pass
+
+        async def close(renderer):
+            closed.append(renderer)
+
+        for renderer in (shared, private):
+            monkeypatch.setattr(renderer, "_ensure_browser", ensure_browser)
+            monkeypatch.setattr(renderer, "close", functools.partial(close, renderer))
+        async with shared:
+            pass
+        async with private:
+            pass
+
+        assert closed == [private]
+
+
+class TestRendererCaching:
+    """Test cases for MermaidRenderer caching without a browser"""
+
+    @pytest.fixture
+    def renderer(self, tmp_path):
+        renderer = MermaidRenderer()
+        renderer._disk_cache = DiskCache(tmp_path)
+        renderer.calls = 0
+        renderer.gate = None
+
+        async def render_page(code, config, output_format):
+            renderer.calls += 1
+            if renderer.gate is not None:
+                await renderer.gate.wait()
+            if code == "broken":
+                return RenderResult(success=False, format=output_format, error="boom")
+            return png_result()
+
+        renderer._render_page = render_page
+        return renderer
+
+    async def test_render_writes_disk_cache(self, renderer, tmp_path):
+        """Test that a fresh render is stored on disk and served from there later"""
+        result = await renderer.render("graph TD\n    A --> B")
+        assert result.success
+        assert renderer.calls == 1
+
+        renderer._cache.clear()
+        again = await renderer.render("graph TD\n    A --> B")
+        assert renderer.calls == 1
+        assert again.data == result.data
+
+    async def test_failed_render_not_cached(self, renderer, tmp_path):
+        """Test that failures are rendered again rather than cached"""
+        assert not (await renderer.render("broken")).success
+        assert not (await renderer.render("broken")).success
+        assert renderer.calls == 2
+        assert list(tmp_path.iterdir()) == []
+
+    async def test_clear_cache_clears_disk(self, renderer, tmp_path):
+        """Test that clear_cache drops memory and disk entries"""
+        await renderer.render("graph TD\n    A --> B")
+        renderer.clear_cache()
+
+        assert list(tmp_path.iterdir()) == []
+        await renderer.render("graph TD\n    A --> B")
+        assert renderer.calls == 2
+
+    async def test_concurrent_renders_coalesce(self, renderer):
+        """Test that identical concurrent renders share one page render"""
+        renderer.gate = asyncio.Event()
+        tasks = [asyncio.ensure_future(renderer.render("graph TD\n    A --> B")) for _ in range(3)]
+        await asyncio.sleep(0)
+        renderer.gate.set()
+        results = await asyncio.gather(*tasks)
+
+        assert renderer.calls == 1
+        assert all(r.data == png_result().data for r in results)
+
+    async def test_results_are_copies(self, renderer):
+        """Test that no caller can mutate the cached result's metadata"""
+        renderer.gate = asyncio.Event()
+        leader = asyncio.ensure_future(renderer.render("graph TD\n    A --> B"))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(renderer.render("graph TD\n    A --> B"))
+        await asyncio.sleep(0)
+        renderer.gate.set()
+        for result in await asyncio.gather(leader, waiter):
+            result.metadata["width"] = -1
+
+        cached = await renderer.render("graph TD\n    A --> B")
+        assert cached.metadata["width"] == 10
+        cached.metadata["width"] = -1
+        assert (await renderer.render("graph TD\n    A --> B")).metadata["width"] == 10
+
+    async def test_cancelled_leader_hands_render_to_waiter(self, renderer):
+        """Test that cancelling the first caller doesn't cancel coalesced waiters"""
+        renderer.gate = asyncio.Event()
+        leader = asyncio.ensure_future(renderer.render("graph TD\n    A --> B"))
+        while not renderer.calls:
+            await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(renderer.render("graph TD\n    A --> B"))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        renderer.gate.set()
+
+        assert (await waiter).success
+        assert leader.cancelled()
+        assert renderer.calls == 2
+        assert not renderer._inflight
+
+    async def test_svg_batch_cached_apart_from_page_renders(self, renderer):
+        """Test that batch SVG markup is never served for a single render, or back"""
+        batches = []
+
+        async def render_svg_batch(codes, config):
+            batches.append(codes)
+            return [svg_result('<svg id="batch-0"/>') for _ in codes]
+
+        renderer._render_svg_batch = render_svg_batch
+        code = "graph TD\n    A --> B"
+        config = renderer_module.RenderConfig()
+        assert renderer._cache_key(code, config, OutputFormat.SVG) != \
+            renderer._cache_key(code, config, OutputFormat.SVG, mode="batch")
+
+        [batched] = await renderer.render_batch([(code, config)], OutputFormat.SVG)
+        single = await renderer.render(code, config, OutputFormat.SVG)
+        assert renderer.calls == 1
+        assert single.data != batched.data
+
+        [again] = await renderer.render_batch([(code, config)], OutputFormat.SVG)
+        assert len(batches) == 1
+        assert again.data == batched.data
+        again.metadata["raw_size"] = -1
+        [third] = await renderer.render_batch([(code, config)], OutputFormat.SVG)
+        assert third.metadata["raw_size"] == len('<svg id="batch-0"/>')
+
+
+class TestPageTemplate:
+    """Test cases for the generated page"""
+
+    def test_ready_flag_set_after_initialize(self):
+        """Test that batch renders can wait until the config has been applied"""
+        html = MermaidRenderer()._create_html("", renderer_module.RenderConfig(), start_on_load=False)
+        initialize = html.index("mermaid.initialize(")
+        ready = html.index("window.__sailorReady = true")
+        assert initialize < ready
+        assert "mermaid.run()" not in html
@@ -0,0 +1,246 @@
+"""Unit tests for the core Mermaid validator"""
+import pytest
+
+from tests.conftest import load_source_module
+
+validator_module = load_source_module("sailor/core/validator.py")
+DiagramType = validator_module.DiagramType
+MermaidValidator = validator_module.MermaidValidator
+Severity = validator_module.Severity
+ValidationError = validator_module.ValidationError
+
+
+@pytest.fixture
+def validator():
+    return MermaidValidator()
+
+
+class TestSeverity:
+    """Test cases for Severity"""
+
+    def test_every_severity_is_truthy(self):
+        """Test that `if issue.severity:` holds for every level"""
+        assert all(Severity)
+
+    def test_ordered_by_severity(self):
+        """Test that more severe levels sort first"""
+        assert sorted([Severity.INFO, Severity.ERROR, Severity.WARNING]) == [
+            Severity.ERROR, Severity.WARNING, Severity.INFO
+        ]
+
+    def test_labels(self):
+        """Test the lowercase labels sent in API and tool responses"""
+        assert [s.label for s in Severity] == ["error", "warning", "info"]
+
+    def test_issue_defaults_to_error(self):
+        """Test that issues are errors unless marked otherwise"""
+        assert ValidationError(line=1, column=1, message="x").severity is Severity.ERROR
+
+    def test_warnings_carry_warning_severity(self, validator):
+        """Test that validator warnings are marked as warnings"""
+        result = validator.validate("graph TD\n    A[" + "x" * 130 + "] --> B")
+        assert result.warnings
+        assert all(w.severity is Severity.WARNING for w in result.warnings)
+
+
+class TestBracketBalance:
+    """Test cases for whole-code bracket balancing"""
+
+    @staticmethod
+    def bracket_errors(result):
+        return [(e.line, e.column) for e in result.errors if e.message == "Unmatched brackets"]
+
+    def test_brackets_may_span_lines(self, validator):
+        """Test that a bracket closed on a later line is balanced"""
+        code = "classDiagram\n    class Animal {\n        +String name\n    }"
+        assert self.bracket_errors(validator.validate(code)) == []
+
+    def test_unclosed_bracket_located(self, validator):
+        """Test that the last unclosed opening bracket is reported"""
+        result = validator.validate("graph TD\n    A[Start --> B")
+        assert self.bracket_errors(result) == [(2, 6)]
+
+    def test_stray_closing_bracket_located(self, validator):
+        """Test that the first stray closing bracket is reported"""
+        result = validator.validate("graph TD\n    A --> B]\n    B --> C")
+        assert self.bracket_errors(result) == [(2, 12)]
+
+    def test_one_error_per_unbalanced_kind(self, validator):
+        """Test that several broken lines of one kind report a single error"""
+        result = validator.validate("graph TD\n    A[x --> B\n    C[y --> D\n    E --> F(z")
+        assert self.bracket_errors(result) == [(3, 6), (4, 12)]
+
+    def test_mismatches_across_lines_cancel_out(self, validator):
+        """Known blind spot: an unclosed '[' and a later stray ']' balance the totals"""
+        result = validator.validate("graph TD\nA[x --> B\nC --> D]")
+        assert self.bracket_errors(result) == []
+
+    def test_er_cardinality_braces_ignored(self, validator):
+        """Test that crow's-foot markers such as o{ are not counted as brackets"""
+        code = "erDiagram\n    CUSTOMER ||--o{ ORDER : places\n    ORDER }|..|{ LINE-ITEM : contains"
+        assert self.bracket_errors(validator.validate(code)) == []
+        assert self.bracket_errors(validator.validate(code.replace("erDiagram", "graph TD"))) != []
+
+
+class TestResultCache:
+    """Test cases for the per-validator result cache"""
+
+    def test_repeat_returns_equal_copies(self, validator):
+        """Test that a cached result is handed out as a fresh copy"""
+        code = "graph TD\n    1bad --> B"
+        first = validator.validate(code)
+        first.errors.clear()
+        first.metadata["type"] = "changed"
+
+        second = validator.validate(code)
+        assert second.errors
+        assert second.metadata["type"] == "flowchart"
+        assert second.errors is not validator.validate(code).errors
+
+    def test_least_recently_used_evicted(self):
+        """Test that the cache keeps only the most recently used entries"""
+        validator = MermaidValidator(cache_size=2)
+        validator.validate("graph TD\n    A --> B")
+        validator.validate("graph TD\n    B --> C")
+        validator.validate("graph TD\n    A --> B")
+        validator.validate("graph TD\n    C --> D")
+
+        assert list(validator._cache) == [
+            ("graph TD\n    A --> B", False),
+            ("graph TD\n    C --> D", False),
+        ]
+
+    def test_fast_fail_cached_separately(self, validator):
+        """Test that full and fast-fail results don't shadow each other"""
+        code = "graph TD\n    1bad --> 2bad"
+        assert len(validator.validate(code, fast_fail=True).errors) == 1
+        assert len(validator.validate(code).errors) == 2
+
+
+class TestFastFail:
+    """Test cases for fast_fail validation"""
+
+    def test_stops_at_first_error(self, validator):
+        """Test that fast_fail reports only the first error"""
+        code = 'graph TD\n    A["open --> B\n    C[x --> D'
+        full = validator.validate(code)
+        fast = validator.validate(code, fast_fail=True)
+
+        assert len(full.errors) > 1
+        assert fast.errors == full.errors[:1]
+        assert not fast.is_valid
+
+    def test_valid_code_unaffected(self, validator):
+        """Test that fast_fail gives the same verdict on valid code"""
+        code = "graph TD\n    A[Start] --> B[End]"
+        assert validator.validate(code, fast_fail=True).is_valid
+        assert validator.validate(code).is_valid
+
+
+class TestDiagramTypeDetection:
+    """Test cases for declaration detection"""
+
+    @pytest.mark.parametrize("code, expected", [
+        ("graph TD\n    A --> B", DiagramType.FLOWCHART),
+        ("flowchart LR\n    A --> B", DiagramType.FLOWCHART),
+        ("sequenceDiagram\n    A->>B: hi", DiagramType.SEQUENCE),
+        ("classDiagram\n    class A", DiagramType.CLASS),
+        ("stateDiagram-v2\n    [*] --> A", DiagramType.STATE),
+        ("erDiagram\n    A ||--o{ B : has", DiagramType.ER),
+        ("gantt\n    title Plan", DiagramType.GANTT),
+        ("pie\n    \"a\" : 1", DiagramType.PIE),
+        ("gitGraph\n    commit", DiagramType.GITGRAPH),
+        ("C4Context\n    title System", DiagramType.C4CONTEXT),
+    ])
+    def test_declaration_on_first_line(self, validator, code, expected):
+        """Test that each declaration keyword is recognized"""
+        assert validator.validate(code).diagram_type is expected
+
+    @pytest.mark.parametrize("code, expected", [
+        ("---\ntitle: Flow\n---\nflowchart LR\n    A --> B", DiagramType.FLOWCHART),
+        ("%% generated\nsequenceDiagram\n    A->>B: hi", DiagramType.SEQUENCE),
+        ("\n\n    pie\n    \"a\" : 1", DiagramType.PIE),
+    ])
+    def test_declaration_after_front_matter_or_comments(self, validator, code, expected):
+        """Test that the declaration is found below front matter, comments and blank lines"""
+        assert validator.validate(code).diagram_type is expected
+
+    @pytest.mark.parametrize("code", [
+        "graph\n    A --> B",
+        "graph XY\n    A --> B",
+        "grape TD\n    A --> B",
+        "A --> B",
+    ])
+    def test_invalid_declarations(self, validator, code):
+        """Test that flowcharts need a direction and unknown keywords are rejected"""
+        result = validator.validate(code)
+        assert result.diagram_type is None
+        assert not result.is_valid
+
+
+class TestFlowchartEdges:
+    """Test cases for flowchart edge and node ID checks"""
+
+    @staticmethod
+    def node_id_errors(result):
+        return [e.message for e in result.errors if e.message.startswith("Invalid node ID")]
+
+    @pytest.mark.parametrize("line", [
+        "A --> B",
+        "A ---> B",
+        "A ----> B",
+        "A -.-> B",
+        "A[Start] --> B[End]",
+        "node_1 --> node_2",
+    ])
+    def test_valid_edges(self, validator, line):
+        """Test that dashed and longer links yield clean endpoint IDs"""
+        result = validator.validate(f"graph TD\n    {line}")
+        assert self.node_id_errors(result) == []
+
+    def test_invalid_node_ids(self, validator):
+        """Test that IDs starting with a digit or underscore are flagged"""
+        result = validator.validate("graph TD\n    1bad --> _hidden")
+        assert self.node_id_errors(result) == [
+            "Invalid node ID: '1bad'",
+            "Invalid node ID: '_hidden'",
+        ]
+        assert result.errors[0].line == 2
+        assert result.errors[0].column == 5
+
+    def test_comment_lines_skipped(self, validator):
+        """Test that edges inside %% comments are not checked"""
+        code = "graph TD\n    %% 1bad --> 2bad\n    A --> B"
+        assert self.node_id_errors(validator.validate(code)) == []
+
+    def test_only_first_edge_per_line_checked(self, validator):
+        """Test that chained edges check the first edge's endpoints"""
+        result = validator.validate("graph TD\n    A --> B --> 3bad")
+        assert self.node_id_errors(result) == []
+
+    def test_single_node_warning(self, validator):
+        """Test that a diagram with one node is warned about"""
+        single = validator.validate("graph TD\n    A --> A")
+        assert [w.message for w in single.warnings] == ["Diagram contains only one node"]
+        assert validator.validate("graph TD\n    A --> B\n    B --> C").warnings == []
+
+
+class TestMetadataAndSanitize:
+    """Test cases for metadata extraction and sanitization"""
+
+    def test_flowchart_metadata(self, validator):
+        """Test line, node and edge counts"""
+        metadata = validator.validate("graph TD\n    A[Start] --> B[End]\n    B --> C").metadata
+        assert metadata["line_count"] == 3
+        assert metadata["node_count"] == 2
+        assert metadata["edge_count"] == 2
+        assert metadata["complexity"] == 4
+
+    def test_sanitize_strips_script_injection(self, validator):
+        """Test that scripts, javascript: URLs and event handlers are removed"""
+        code = 'graph TD\n    A[<script>alert(1)</script>x] --> B\n    click A "javascript:run()"\n    C[<b onclick=x>y</b><br/>]'
+        sanitized = validator.sanitize(code)
+        assert "script" not in sanitized
+        assert "javascript:" not in sanitized
+        assert "onclick" not in sanitized
+        assert "<br/>" in sanitized
@@ -0,0 +1,42 @@
+"""Unit tests for the Mermaid resource library"""
+from src.sailor_mcp.mermaid_resources import MermaidResources
+
+
+class TestMemoizedLookups:
+    """Test cases for the memoized resource lookups"""
+
+    def test_syntax_help_copies_independent(self):
+        """Test that mutating returned syntax help never leaks into later calls"""
+        resources = MermaidResources()
+        help_ = resources.get_syntax_help("flowchart")
+        help_["directions"] = "changed"
+        help_.clear()
+
+        again = resources.get_syntax_help("flowchart")
+        assert "directions" in again
+        assert again["directions"] != "changed"
+        assert resources.syntax_guide["flowchart"]["directions"] != "changed"
+
+    def test_unknown_syntax_help_not_shared(self):
+        """Test that the empty result for unknown types is a fresh dict each time"""
+        resources = MermaidResources()
+        unknown = resources.get_syntax_help("no-such-type")
+        unknown["leaked"] = True
+
+        assert resources.get_syntax_help("no-such-type") == {}
+
+    def test_template_copies_independent(self):
+        """Test that mutating a returned template leaves the library untouched"""
+        resources = MermaidResources()
+        template = resources.get_template("Process Flow", "flowchart")
+        original = template.template
+        template.template = "changed"
+        template.variables.append("extra")
+
+        again = resources.get_template("Process Flow", "flowchart")
+        assert again.template == original
+        assert "extra" not in again.variables
+
+    def test_unknown_template(self):
+        """Test that unknown template names return None"""
+        assert MermaidResources().get_template("No Such Template") is None
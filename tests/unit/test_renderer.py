@@ -1,8 +1,10 @@
 """Unit tests for Mermaid renderer - REAL IMPLEMENTATIONS ONLY"""
 import pytest
+import asyncio
 import base64
 import tempfile
 import os
+from unittest.mock import AsyncMock
 from src.sailor_mcp.renderer import MermaidRenderer, MermaidConfig, get_renderer, cleanup_renderer
 
 # Check if Playwright is available
@@ -314,6 +316,94 @@ class TestRendererWithoutPlaywright:
         assert renderer.browser is None
         assert renderer.playwright is None
 
+    @pytest.mark.asyncio
+    async def test_render_cache_hit_without_browser(self):
+        """Test a repeated render is served from cache without starting the browser"""
+        renderer = MermaidRenderer()
+        code = "graph TD\n    A --> B"
+        config = MermaidConfig()
+        key = renderer._cache_key(code, config, "png")
+        renderer._remember(key, {'png': 'cached-data'})
+
+        result = await renderer.render(code, config, "png")
+
+        assert result == {'png': 'cached-data'}
+        assert renderer.browser is None
+
+    @pytest.mark.asyncio
+    async def test_stop_wakes_renders_waiting_for_a_page(self):
+        """Test renders blocked on an empty page pool fail instead of hanging on stop"""
+        renderer = MermaidRenderer()
+        renderer.browser = AsyncMock()
+        renderer._page_pool = asyncio.Queue()
+        waiting = [
+            asyncio.ensure_future(renderer.render(f"graph TD\n    A --> B{i}", MermaidConfig()))
+            for i in range(2)
+        ]
+        await asyncio.sleep(0.05)
+
+        await renderer.stop()
+
+        for task in waiting:
+            with pytest.raises(RuntimeError, match="stopped"):
+                await asyncio.wait_for(task, timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_render_hands_over_to_waiter(self):
+        """Test cancelling the first of two identical renders doesn't cancel the second"""
+        renderer = MermaidRenderer()
+        calls = []
+        gate = asyncio.Event()
+
+        async def render_in_browser(mermaid_code, config, output_format):
+            calls.append(mermaid_code)
+            await gate.wait()
+            return {'png': 'rendered'}
+
+        renderer._render = render_in_browser
+        code = "graph TD\n    A --> B"
+        first = asyncio.ensure_future(renderer.render(code, MermaidConfig(), "png"))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(renderer.render(code, MermaidConfig(), "png"))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+
+        assert await second == {'png': 'rendered'}
+        assert first.cancelled()
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_stop_during_page_reset(self):
+        """Test a page returned while stop() runs is dropped without raising"""
+        renderer = MermaidRenderer()
+        renderer.browser = AsyncMock()
+        renderer._context = AsyncMock()
+        renderer._page_pool = asyncio.Queue()
+
+        class Page:
+            async def goto(self, url):
+                await renderer.stop()
+                raise RuntimeError("Target page, context or browser has been closed")
+
+            async def close(self):
+                raise RuntimeError("Target page, context or browser has been closed")
+
+        await renderer._return_page(Page())
+
+        assert renderer._page_pool is None
+        assert renderer._context is None
+
+    def test_cache_key_depends_on_config_and_format(self):
+        """Test cache keys differ when theme or output format differ"""
+        code = "graph TD\n    A --> B"
+        key = MermaidRenderer._cache_key(code, MermaidConfig(), "png")
+        assert key == MermaidRenderer._cache_key(code, MermaidConfig(), "png")
+        assert key != MermaidRenderer._cache_key(code, MermaidConfig(theme="dark"), "png")
+        assert key != MermaidRenderer._cache_key(code, MermaidConfig(), "svg")
+
     def test_html_generation_without_browser(self):
         """Test HTML generation works without browser"""
         renderer = MermaidRenderer()
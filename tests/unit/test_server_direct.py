@@ -21,6 +21,8 @@ from src.sailor_mcp.server import (
     architecture_diagram,
     data_visualization,
     project_timeline,
+    validate_code,
+    render_diagrams_batch,
     mcp
 )
 from src.sailor_mcp.renderer import MermaidConfig
@@ -296,6 +298,28 @@ class TestSailorMCPServerDirect:
         result = MermaidValidator.validate(complex)
         assert result['valid'] is True
 
+    def test_validate_code_reuses_results_safely(self):
+        """Test cached validation matches the validator and returns independent lists"""
+        code = "graph TD\n    A --> B"
+        first = validate_code(code)
+        assert first == MermaidValidator.validate(code)
+
+        first['warnings'].append("mutated by caller")
+        second = validate_code(code)
+        assert "mutated by caller" not in second['warnings']
+
+    @pytest.mark.asyncio
+    async def test_render_diagrams_batch_reports_invalid_items(self):
+        """Test batch rendering returns per-item errors in input order without rendering"""
+        result = await render_diagrams_batch.fn(
+            diagrams=[{"code": "not a diagram"}, {"code": ""}]
+        )
+
+        assert result['count'] == 2
+        assert all(item['valid'] is False for item in result['results'])
+        assert any("Invalid diagram type" in err for err in result['results'][0]['errors'])
+        assert any("Empty" in err for err in result['results'][1]['errors'])
+
     @pytest.mark.asyncio
     async def test_mcp_server_instance_exists(self):
         """Test that the FastMCP server instance is properly configured"""
@@ -141,6 +141,14 @@ class TestMermaidValidator:
         assert result["valid"]
         assert any("Empty node labels" in w for w in result["warnings"])
     
+    def test_flowchart_connection_and_node_warnings(self):
+        """Test dotted links count as connections and bare IDs as no node definitions"""
+        dotted = MermaidValidator.validate("graph TD\n    A[Start] -.-> B[End]")
+        assert not any("No connections" in w for w in dotted["warnings"])
+        
+        bare = MermaidValidator.validate("graph TD\n    A --> B")
+        assert any("No node definitions" in w for w in bare["warnings"])
+    
     def test_fix_common_errors(self):
         """Test fixing common errors"""
         # Test missing direction